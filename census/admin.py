@@ -10,6 +10,9 @@ from requests.exceptions import RequestException
 from unfold.admin import ModelAdmin, StackedInline
 from urllib3.util.retry import Retry
 
+from religious_ecologies.admin import BaseModelAdmin
+
+from . import catalog
 from .models import CensusSchedule, Clergy, Denomination, Membership, ReligiousBody
 
 
@@ -42,20 +45,60 @@ class ClergyInline(StackedInline):
     tab = True
 
 
+def cache_choices(field):
+    """
+    Read a ModelChoiceField's choices once, so that every form of an inline
+    formset renders them without querying again.
+    """
+    choices = list(field.choices)
+    field.choices = choices
+    # The admin wraps select widgets in RelatedFieldWidgetWrapper, which
+    # renders the widget it wraps
+    widget = field.widget
+    while hasattr(widget, "widget"):
+        widget = widget.widget
+        widget.choices = choices
+
+
 class MembershipInline(StackedInline):
     model = Membership
     extra = 1
     tab = True
 
+    def get_queryset(self, request):
+        # Membership.__str__ shows the religious body
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("religious_body")
+            .defer("religious_body__search_vector")
+        )
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        # Memberships can only belong to the schedule's own religious bodies.
+        # New schedules have none until they are saved.
+        field = formset.form.base_fields["religious_body"]
+        if obj is None:
+            field.queryset = ReligiousBody.objects.none()
+        else:
+            field.queryset = obj.church_details.defer("search_vector").order_by("name")
+        cache_choices(field)
+        return formset
+
 
 class ReligiousBodyInline(StackedInline):
     model = ReligiousBody
-    raw_id_fields = [
+    autocomplete_fields = [
         "location",
+        "denomination",
     ]
     extra = 1
     tab = True
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("search_vector")
+
 
 @admin.action(description="Fetch denominations from Apiary")
 def sync_denominations(modeladmin, request, queryset):
@@ -124,12 +167,15 @@ def sync_denominations(modeladmin, request, queryset):
         )
     finally:
         error_log.close()
+        # Rebuild the denomination catalog on next use
+        catalog.invalidate()
 
 
 @admin.register(Denomination)
-class DenominationAdmin(ModelAdmin):
+class DenominationAdmin(BaseModelAdmin):
     list_display = ["name", "denomination_id", "family_census", "family_relec"]
     search_fields = ["name", "denomination_id"]
+    search_rank_fields = ["name"]
     ordering = ["name"]
     list_filter = ["family_census", "family_relec"]
     actions = [sync_denominations]
@@ -139,7 +185,7 @@ class DenominationAdmin(ModelAdmin):
 
 
 @admin.register(CensusSchedule)
-class CensusScheduleAdmin(ModelAdmin):
+class CensusScheduleAdmin(BaseModelAdmin):
     list_display = [
         "schedule_title",
         "schedule_id",
@@ -187,7 +233,7 @@ class CensusScheduleAdmin(ModelAdmin):
 
 
 @admin.register(Clergy)
-class ClergyAdmin(ModelAdmin):
+class ClergyAdmin(BaseModelAdmin):
     list_display = [
         "name",
         "is_assistant",
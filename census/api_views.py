@@ -1,56 +1,66 @@
 # census/api_views.py
-from django.db.models import IntegerField, Sum, Value
-from django.db.models.functions import Coalesce
+import logging
+
+from django.db.models import Max, Prefetch
+from django.http import QueryDict, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, viewsets
+from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 
+from religious_ecologies.middleware import timing
+
+from .catalog import census_families, family_denomination_ids, get_catalog
+from .exports import EXPORT_FORMATS, export_chunks
 from .filters import ReligiousBodyFilter
-from .models import Denomination, ReligiousBody
+from .markers import (
+    annotate_total_members,
+    compact_locations,
+    compact_markers,
+    location_marker_rows,
+    marker_queryset,
+    marker_rows,
+)
+from .models import Clergy, Denomination, Membership, ReligiousBody
+from .pagination import decode_cursor, encode_cursor
+from .search import RankedSearchFilter
 from .serializers import (
     DenominationSerializer,
-    MapMarkerSerializer,
+    MarkerSummarySerializer,
     ReligiousBodySerializer,
 )
+from .stats import get_stats
+
+logger = logging.getLogger(__name__)
 
 
 class DenominationViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Denomination.objects.all().order_by("name")
     serializer_class = DenominationSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, RankedSearchFilter]
     filterset_fields = ["family_census", "family_relec"]
-    search_fields = ["name"]
+    trigram_search_fields = ["name"]
+    # Denominations are a small lookup table that the map loads in full
+    pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        # Unfiltered lists are served from the in-memory catalog
+        if not set(request.query_params) - {"_", "format"}:
+            return Response(get_catalog().denominations)
+        return super().list(request, *args, **kwargs)
 
     @action(detail=False, methods=["get"])
     def families(self, request):
         """Return unique denomination families for filtering"""
-        census_families = (
-            Denomination.objects.values_list("family_census", flat=True)
-            .distinct()
-            .order_by("family_census")
-        )
-        relec_families = (
-            Denomination.objects.values_list("family_relec", flat=True)
-            .distinct()
-            .order_by("family_relec")
-        )
-
-        # Count denominations in each family for display purposes
-        family_counts = {}
-        for family in census_families:
-            if family:  # Skip empty family names
-                count = Denomination.objects.filter(family_census=family).count()
-                family_counts[family] = count
-
+        catalog = get_catalog()
         return Response(
             {
-                "census_families": [
-                    {"name": family, "count": family_counts.get(family, 0)}
-                    for family in census_families
-                    if family
-                ],
-                "relec_families": list(relec_families),
+                "census_families": catalog.census_families,
+                "relec_families": catalog.relec_families,
             }
         )
 
@@ -58,56 +68,243 @@ class DenominationViewSet(viewsets.ReadOnlyModelViewSet):
     def by_family(self, request):
         """Return denominations grouped by family"""
         family = request.query_params.get("family_census", None)
+        return Response(get_catalog().by_family(family))
 
-        if family:
-            denominations = Denomination.objects.filter(family_census=family).order_by(
-                "name"
-            )
-        else:
-            denominations = Denomination.objects.all().order_by("family_census", "name")
 
-        serializer = self.get_serializer(denominations, many=True)
-        return Response(serializer.data)
+# Default and maximum number of markers returned per map_data page
+MAP_PAGE_SIZE = 2000
+MAX_MAP_PAGE_SIZE = 5000
+
+# Seconds browsers may reuse a marker summary before revalidating it
+SUMMARY_MAX_AGE = 60 * 60 * 24
+
+# Largest number of ids accepted by the batch endpoint
+MAX_BATCH_IDS = 500
 
 
 class ReligiousBodyViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = ReligiousBody.objects.all().select_related(
-        "location", "denomination", "census_record"
-    )
+    # The search document is only read by the database
+    queryset = ReligiousBody.objects.defer("search_vector")
     serializer_class = ReligiousBodySerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, RankedSearchFilter]
     filterset_class = ReligiousBodyFilter
-    search_fields = ["name", "address", "census_code"]
+    search_vector_field = "search_vector"
+    # Codes are matched as substrings too, as the tsvector only has whole codes
+    trigram_search_fields = ["name", "address", "census_code"]
+
+    def get_selected_fields(self):
+        """Fields requested through ?fields= and ?expand=, or None for all."""
+        return self.serializer_class.select_fields(
+            self.request.query_params.get("fields"),
+            self.request.query_params.get("expand"),
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["selected_fields"] = self.get_selected_fields()
+        return context
+
+    def get_queryset(self):
+        """
+        Build the queryset for the requested fields, joining and prefetching
+        only what the serializer will read.
+        """
+        selected = self.get_selected_fields()
+        queryset = super().get_queryset()
+
+        if selected is not None:
+            model_fields = {field.name for field in ReligiousBody._meta.concrete_fields}
+            only = [name for name in selected if name in model_fields]
+            if "location_details" in selected:
+                only.append("location")
+            if "denomination_details" in selected:
+                only.append("denomination")
+            if "pastors" in selected:
+                only.append("census_record__id")
+            queryset = queryset.only(*only)
+        else:
+            selected = set(self.serializer_class.Meta.fields)
+
+        related = []
+        if "location_details" in selected:
+            related.append("location")
+        if "denomination_details" in selected:
+            related.append("denomination")
+        if "pastors" in selected:
+            related.append("census_record")
+        # A bare select_related() would follow every non-null foreign key
+        if related:
+            queryset = queryset.select_related(*related)
+
+        if selected & {"membership_details", "total_members"}:
+            queryset = queryset.prefetch_related(
+                Prefetch("membership", queryset=Membership.objects.order_by("id"))
+            )
+        if "pastors" in selected:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "census_record__clergy",
+                    queryset=Clergy.objects.filter(is_assistant=False).order_by("id"),
+                    to_attr="pastor_list",
+                )
+            )
+        return queryset
+
+    @action(detail=False, methods=["get", "post"])
+    def batch(self, request):
+        """
+        Retrieve many religious bodies by id in one request, from ?ids=1,2,3
+        or a POST body {"ids": [1, 2, 3]}, [1, 2, 3] or ids=1&ids=2. Results
+        follow the order of the ids; ids that do not exist are listed under
+        "missing".
+        """
+        data = request.data if request.method == "POST" else request.query_params
+        if isinstance(data, QueryDict):
+            ids = data.getlist("ids")
+        elif isinstance(data, dict):
+            ids = data.get("ids", [])
+        elif isinstance(data, list):
+            ids = data
+        else:
+            raise ValidationError({"ids": "Expected a list of ids."})
+        if isinstance(ids, str):
+            ids = [ids]
+        if not isinstance(ids, list):
+            raise ValidationError({"ids": "Expected a list of ids."})
+        # Comma-separated strings are split into their ids
+        ids = [
+            part
+            for value in ids
+            for part in (value.split(",") if isinstance(value, str) else [value])
+            if not isinstance(part, str) or part.strip()
+        ]
+
+        try:
+            ids = list(dict.fromkeys(int(value) for value in ids))
+        except (TypeError, ValueError):
+            raise ValidationError({"ids": "Ids must be integers."})
+        if len(ids) > MAX_BATCH_IDS:
+            raise ValidationError(
+                {"ids": f"At most {MAX_BATCH_IDS} ids can be requested at once."}
+            )
+
+        bodies = {body.pk: body for body in self.get_queryset().filter(pk__in=ids)}
+        serializer = self.get_serializer(
+            [bodies[pk] for pk in ids if pk in bodies], many=True
+        )
+        return Response(
+            {
+                "results": serializer.data,
+                "missing": [pk for pk in ids if pk not in bodies],
+            }
+        )
+
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        """
+        Counts, members, edifice value and debt per family and denomination
+        for the current filters, computed with one GROUP BY and cached.
+        """
+        return Response(
+            get_stats(
+                request.query_params.lists(),
+                lambda: self.filter_queryset(ReligiousBody.objects.all()),
+                request,
+            )
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"export/(?P<export_format>csv|ndjson|geojson)",
+    )
+    def export(self, request, export_format):
+        """
+        Stream the full joined dataset for the current filters as CSV, NDJSON
+        or GeoJSON, without pagination or per-row serializer queries.
+        """
+        queryset = self.filter_queryset(ReligiousBody.objects.order_by("id"))
+        content_type, _ = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            export_chunks(queryset, export_format), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="religious-bodies.{export_format}"'
+        )
+        return response
+
+    @action(detail=True, methods=["get"])
+    def summary(self, request, pk=None):
+        """
+        Popup details for one map marker. Responses carry an ETag and
+        Last-Modified from the records' updated_at and may be cached for a
+        day, so reopening a popup costs at most a 304.
+        """
+        queryset = annotate_total_members(
+            ReligiousBody.objects.select_related("location", "denomination").defer(
+                "search_vector"
+            )
+        ).annotate(membership_updated_at=Max("membership__updated_at"))
+        religious_body = get_object_or_404(queryset, pk=pk)
+
+        last_modified = max(
+            timestamp
+            for timestamp in (
+                religious_body.updated_at,
+                religious_body.membership_updated_at,
+                religious_body.location and religious_body.location.updated_at,
+                religious_body.denomination and religious_body.denomination.updated_at,
+            )
+            if timestamp
+        )
+        etag = f'"{religious_body.pk}-{int(last_modified.timestamp() * 1000000)}"'
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(last_modified.timestamp())
+        )
+        if response is None:
+            serializer = MarkerSummarySerializer(
+                religious_body, context={"request": request}
+            )
+            response = Response(serializer.data)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+        patch_cache_control(response, public=True, max_age=SUMMARY_MAX_AGE)
+        return response
 
     @action(detail=False, methods=["get"])
     def map_data(self, request):
-        """Optimized geodata endpoint for map display with robust error handling"""
+        """
+        Optimized geodata endpoint for map display with robust error handling.
+        With mode=by_location, returns one point per place instead of one
+        marker per religious body.
+        """
         try:
             # Start with base queryset - only select what we need
-            queryset = ReligiousBody.objects.filter(
-                location__isnull=False
-            ).select_related("location", "denomination")
+            queryset = marker_queryset()
 
             # Apply filtering with explicit logging and error handling
             if "family_census" in request.query_params:
                 family_census = request.query_params.get("family_census")
-                print(f"Filtering by family_census: {family_census}")
+                logger.debug("Filtering by family_census: %s", family_census)
                 try:
                     queryset = queryset.filter(
-                        denomination__family_census=family_census
+                        denomination_id__in=sorted(
+                            family_denomination_ids(family_census)
+                        )
                     )
                 except Exception as e:
-                    print(f"Error filtering by family_census: {e}")
+                    logger.warning("Error filtering by family_census: %s", e)
                     # Continue with unfiltered queryset instead of failing
 
             # Add denomination filtering
             if "denomination" in request.query_params:
                 denomination_id = request.query_params.get("denomination")
-                print(f"Filtering by denomination_id: {denomination_id}")
+                logger.debug("Filtering by denomination_id: %s", denomination_id)
                 try:
                     queryset = queryset.filter(denomination_id=denomination_id)
                 except Exception as e:
-                    print(f"Error filtering by denomination_id: {e}")
+                    logger.warning("Error filtering by denomination_id: %s", e)
                     # Continue with previously filtered queryset
 
             # Add bounds filtering if present
@@ -121,48 +318,81 @@ class ReligiousBodyViewSet(viewsets.ReadOnlyModelViewSet):
                         location__lon__gte=west,
                         location__lon__lte=east,
                     )
-                    print(f"Applied bounds filter: {bounds}")
+                    logger.debug("Applied bounds filter: %s", bounds)
                 except Exception as e:
-                    print(f"Error applying bounds filter: {e}")
+                    logger.warning("Error applying bounds filter: %s", e)
 
+            # Page through the results by id so that every marker is reachable
+            # in a stable order; the cursor is the last id of the previous page
             try:
-                # Try to annotate total_members, preferring the recorded total if available
-                queryset = queryset.annotate(
-                    total_members=Coalesce(
-                        # First try to use the recorded total
-                        "membership__total_members_by_sex",
-                        # Then try to calculate from male/female components
-                        Sum(
-                            Coalesce("membership__male_members", 0)
-                            + Coalesce("membership__female_members", 0)
-                        ),
-                        # Default to 0 if none of the above is available
-                        Value(0),
-                        output_field=IntegerField(),
-                    )
-                )
-            except Exception as e:
-                print(f"Error annotating total_members: {e}")
-                # If annotation fails, fall back to a simpler query
-                queryset = queryset.annotate(
-                    total_members=Value(0, output_field=IntegerField())
+                limit = min(
+                    int(request.query_params.get("limit", MAP_PAGE_SIZE)),
+                    MAX_MAP_PAGE_SIZE,
                 )
+                if limit < 1:
+                    raise ValueError(f"Invalid limit: {limit}")
+                cursor = request.query_params.get("cursor")
+                if cursor:
+                    cursor = decode_cursor(cursor)
+                    if request.query_params.get("mode") == "by_location":
+                        queryset = queryset.filter(location_id__gt=cursor)
+                    else:
+                        queryset = queryset.filter(id__gt=cursor)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=400)
+
+            if request.query_params.get("mode") == "by_location":
+                return self._location_map_data(request, queryset, limit)
 
-            # Add a reasonable limit to prevent overloading
-            queryset = queryset[:2000]
+            # Fetch one extra row to find out whether another page exists
+            page = list(marker_rows(queryset.order_by("id"))[: limit + 1])
+            next_cursor = None
+            if len(page) > limit:
+                page = page[:limit]
+                next_cursor = encode_cursor(page[-1][0])
 
-            # Use the lightweight serializer
-            serializer = MapMarkerSerializer(queryset, many=True)
-            data = serializer.data
+            # Markers carry only id, coordinates and a family code; popups
+            # load the rest from the summary endpoint
+            with timing(request, "serialize"):
+                data = compact_markers(page)
 
-            print(f"Returning {len(data)} map markers")
-            return Response(data)
+            logger.debug("Returning %d map markers", len(data))
+            return Response(
+                {
+                    "families": census_families(),
+                    "results": data,
+                    "next_cursor": next_cursor,
+                }
+            )
 
         except Exception as e:
             import traceback
 
-            print(f"Exception in map_data: {e}")
-            print(traceback.format_exc())
+            logger.exception("Exception in map_data: %s", e)
             return Response(
                 {"error": str(e), "traceback": traceback.format_exc()}, status=500
             )
+
+    def _location_map_data(self, request, queryset, limit):
+        """Page of map points aggregated per location, paged by location id"""
+        location_ids = list(
+            queryset.order_by("location_id")
+            .values_list("location_id", flat=True)
+            .distinct()[: limit + 1]
+        )
+        next_cursor = None
+        if len(location_ids) > limit:
+            location_ids = location_ids[:limit]
+            next_cursor = encode_cursor(location_ids[-1])
+
+        with timing(request, "serialize"):
+            data = compact_locations(location_marker_rows(queryset, location_ids))
+
+        logger.debug("Returning %d map locations", len(data))
+        return Response(
+            {
+                "families": census_families(),
+                "results": data,
+                "next_cursor": next_cursor,
+            }
+        )
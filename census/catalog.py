@@ -0,0 +1,91 @@
+import time
+
+from django.db.models import Count
+
+from .models import Denomination
+
+# Seconds a catalog is used before it is rebuilt. Saves and deletes clear the
+# catalog at once in the process that made them; the age limit bounds how
+# long other worker processes can serve a stale copy.
+CATALOG_MAX_AGE = 60 * 10
+
+# Fields of each denomination in the catalog, matching DenominationSerializer
+DENOMINATION_FIELDS = ["id", "denomination_id", "name", "family_census", "family_relec"]
+
+_catalog = None
+
+
+class DenominationCatalog:
+    """
+    In-memory snapshot of the denominations and their families. Denominations
+    only change through the Apiary sync, so the map's lookups are served from
+    here instead of the database.
+    """
+
+    def __init__(self):
+        self.built_at = time.monotonic()
+        self.denominations = list(
+            Denomination.objects.order_by("name").values(*DENOMINATION_FIELDS)
+        )
+        self.census_families = [
+            {"name": row["family_census"], "count": row["count"]}
+            for row in Denomination.objects.exclude(family_census__isnull=True)
+            .exclude(family_census="")
+            .values("family_census")
+            .annotate(count=Count("id"))
+            .order_by("family_census")
+        ]
+        self.relec_families = sorted(
+            {denomination["family_relec"] for denomination in self.denominations},
+            key=lambda family: (family is None, family or ""),
+        )
+
+        grouped = {}
+        for denomination in self.denominations:
+            grouped.setdefault(denomination["family_census"], set()).add(
+                denomination["id"]
+            )
+        self.family_ids = {key: frozenset(ids) for key, ids in grouped.items()}
+
+    def by_family(self, family=None):
+        """Denominations in a census family by name, or all by family and name."""
+        if family:
+            return [d for d in self.denominations if d["family_census"] == family]
+        return sorted(
+            self.denominations,
+            key=lambda d: (d["family_census"] is None, d["family_census"] or ""),
+        )
+
+
+def get_catalog():
+    """Return the current denomination catalog, building it if needed."""
+    global _catalog
+
+    catalog = _catalog
+    if catalog is None or time.monotonic() - catalog.built_at > CATALOG_MAX_AGE:
+        catalog = DenominationCatalog()
+        _catalog = catalog
+    return catalog
+
+
+def family_denomination_ids(family):
+    """
+    Return the ids of the denominations in a census family, so families can
+    be filtered with denomination_id IN (...) on the ReligiousBody index
+    instead of a join on Denomination.family_census.
+    """
+    return get_catalog().family_ids.get(family, frozenset())
+
+
+def census_families():
+    """
+    Return the sorted names of the census families. Map markers refer to
+    their family by its index in this list.
+    """
+    return [family["name"] for family in get_catalog().census_families]
+
+
+def invalidate():
+    """Drop the cached denomination data after denominations change."""
+    global _catalog
+    _catalog = None
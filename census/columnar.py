@@ -0,0 +1,142 @@
+import logging
+import os
+import tempfile
+from decimal import Decimal
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from .exports import EXPORT_CHUNK_SIZE, EXPORT_COLUMNS, export_rows
+from .models import ReligiousBody
+from .rollups import MEMBERSHIP_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Storage names of the snapshot files, one per format
+SNAPSHOT_FILES = {
+    "parquet": "analysis/religious-bodies.parquet",
+    "arrow": "analysis/religious-bodies.arrow",
+}
+
+# Low-cardinality text columns stored as dictionaries (category/factor)
+DICTIONARY_COLUMNS = {
+    "denomination",
+    "family_census",
+    "family_relec",
+    "state",
+    "county",
+    "urban_rural_code",
+}
+
+# Column types other than plain strings
+INT64_COLUMNS = {"religious_body_id", "resource_id", "place_id"}
+FLOAT_COLUMNS = {
+    "lat",
+    "lon",
+    "edifice_value",
+    "edifice_debt",
+    "residence_value",
+    "residence_debt",
+    "expenses",
+    "benevolences",
+    "total_expenditures",
+}
+BOOLEAN_COLUMNS = {"has_pastors_residence"}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "Writing the analysis snapshot requires pyarrow, which is missing "
+            "from this environment (poetry install)"
+        ) from e
+    return pyarrow
+
+
+def _schema(pa):
+    integer_columns = {
+        column
+        for column, lookup in EXPORT_COLUMNS
+        if lookup == "num_edifices" or lookup in MEMBERSHIP_FIELDS
+    }
+    fields = []
+    for column, _ in EXPORT_COLUMNS:
+        if column in DICTIONARY_COLUMNS:
+            type_ = pa.dictionary(pa.int32(), pa.string())
+        elif column in INT64_COLUMNS:
+            type_ = pa.int64()
+        elif column in integer_columns:
+            type_ = pa.int32()
+        elif column in FLOAT_COLUMNS:
+            type_ = pa.float64()
+        elif column in BOOLEAN_COLUMNS:
+            type_ = pa.bool_()
+        else:
+            type_ = pa.string()
+        fields.append(pa.field(column, type_))
+    return pa.schema(fields)
+
+
+def _batches(pa, schema, rows):
+    """Convert export rows into record batches of EXPORT_CHUNK_SIZE rows."""
+    batch = []
+    for row in rows:
+        # Money is exported as float64, which pandas and R load natively
+        batch.append(
+            {
+                key: float(value) if isinstance(value, Decimal) else value
+                for key, value in row.items()
+            }
+        )
+        if len(batch) >= EXPORT_CHUNK_SIZE:
+            yield pa.RecordBatch.from_pylist(batch, schema=schema)
+            batch = []
+    if batch:
+        yield pa.RecordBatch.from_pylist(batch, schema=schema)
+
+
+def build_table(queryset=None):
+    """Return the joined dataset as a pyarrow Table with a typed schema."""
+    pa = _import_pyarrow()
+    schema = _schema(pa)
+    if queryset is None:
+        queryset = ReligiousBody.objects.order_by("id")
+    table = pa.Table.from_batches(
+        list(_batches(pa, schema, export_rows(queryset))), schema=schema
+    )
+    # One dictionary per column, so the Arrow file can be memory-mapped
+    return table.unify_dictionaries().combine_chunks()
+
+
+def write_analysis_snapshot(storage=None):
+    """
+    Write the dataset as Parquet and as an uncompressed Arrow IPC file to
+    storage, replacing the previous snapshot. Returns the storage names.
+    """
+    pa = _import_pyarrow()
+    storage = storage or default_storage
+    table = build_table()
+
+    names = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        parquet_path = os.path.join(tmp_dir, "snapshot.parquet")
+        pa.parquet.write_table(table, parquet_path, compression="zstd")
+
+        arrow_path = os.path.join(tmp_dir, "snapshot.arrow")
+        with pa.OSFile(arrow_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        for key, path in (("parquet", parquet_path), ("arrow", arrow_path)):
+            name = SNAPSHOT_FILES[key]
+            if storage.exists(name):
+                storage.delete(name)
+            with open(path, "rb") as f:
+                names[key] = storage.save(name, File(f))
+
+    logger.info("Wrote analysis snapshot with %d rows", table.num_rows)
+    return names
@@ -0,0 +1,179 @@
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Clergy, Membership
+from .rollups import MEMBERSHIP_FIELDS
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+# (column, lookup) pairs for the exported rows, one row per religious body.
+# Membership columns are annotations summing the body's memberships.
+EXPORT_COLUMNS = [
+    ("religious_body_id", "id"),
+    ("resource_id", "census_record__resource_id"),
+    ("schedule_id", "census_record__schedule_id"),
+    ("schedule_title", "census_record__schedule_title"),
+    ("name", "name"),
+    ("census_code", "census_code"),
+    ("division", "division"),
+    ("address", "address"),
+    ("urban_rural_code", "urban_rural_code"),
+    ("denomination", "denomination__name"),
+    ("denomination_id", "denomination__denomination_id"),
+    ("family_census", "denomination__family_census"),
+    ("family_relec", "denomination__family_relec"),
+    ("place_id", "location__place_id"),
+    ("city", "location__city"),
+    ("county", "location__county"),
+    ("state", "location__state"),
+    ("lat", "location__lat"),
+    ("lon", "location__lon"),
+    ("num_edifices", "num_edifices"),
+    ("edifice_value", "edifice_value"),
+    ("edifice_debt", "edifice_debt"),
+    ("has_pastors_residence", "has_pastors_residence"),
+    ("residence_value", "residence_value"),
+    ("residence_debt", "residence_debt"),
+    ("expenses", "expenses"),
+    ("benevolences", "benevolences"),
+    ("total_expenditures", "total_expenditures"),
+    *[(name, name) for name in MEMBERSHIP_FIELDS],
+    ("pastor_name", "pastor_name"),
+    ("pastor_college", "pastor_college"),
+    ("pastor_seminary", "pastor_seminary"),
+    ("assistant_pastor_name", "assistant_pastor_name"),
+]
+
+
+def _clergy(field, is_assistant):
+    return Subquery(
+        Clergy.objects.filter(
+            census_schedule=OuterRef("census_record"), is_assistant=is_assistant
+        )
+        .order_by("id")
+        .values(field)[:1]
+    )
+
+
+def _membership_total(field):
+    return Subquery(
+        Membership.objects.filter(religious_body=OuterRef("pk"))
+        .order_by()
+        .values("religious_body")
+        .annotate(total=Sum(field))
+        .values("total"),
+        output_field=IntegerField(),
+    )
+
+
+def export_rows(queryset):
+    """
+    Yield export rows as dicts keyed by column name, reading the filtered
+    religious bodies through a server-side cursor. A body with several
+    memberships is one row with their counts summed. Every membership and
+    clergy column is a correlated subquery, so rows stream in the
+    queryset's order without grouping or sorting the whole result first.
+    """
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    rows = (
+        queryset.annotate(
+            pastor_name=_clergy("name", False),
+            pastor_college=_clergy("college", False),
+            pastor_seminary=_clergy("theological_seminary", False),
+            assistant_pastor_name=_clergy("name", True),
+            **{name: _membership_total(name) for name in MEMBERSHIP_FIELDS},
+        )
+        .values_list(*lookups)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    columns = [column for column, _ in EXPORT_COLUMNS]
+    for values in rows:
+        yield dict(zip(columns, values))
+
+
+def _buffered(chunks):
+    """Group small string chunks so each write to the client is a decent size."""
+    buffer = []
+    for chunk in chunks:
+        buffer.append(chunk)
+        if len(buffer) >= 500:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_chunks(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([column for column, _ in EXPORT_COLUMNS])
+    for row in rows:
+        yield writer.writerow(row.values())
+
+
+def _ndjson_chunks(rows):
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder) + "\n"
+
+
+def _geojson_chunks(rows):
+    yield '{"type":"FeatureCollection","features":['
+    separator = ""
+    for row in rows:
+        geometry = None
+        if row["lat"] is not None and row["lon"] is not None:
+            geometry = {"type": "Point", "coordinates": [row["lon"], row["lat"]]}
+        feature = {
+            "type": "Feature",
+            "id": row["religious_body_id"],
+            "geometry": geometry,
+            "properties": row,
+        }
+        yield separator + json.dumps(feature, cls=JSONEncoder)
+        separator = ","
+    yield "]}"
+
+
+# format -> (content type, chunk generator)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", _csv_chunks),
+    "ndjson": ("application/x-ndjson", _ndjson_chunks),
+    "geojson": ("application/geo+json", _geojson_chunks),
+}
+
+
+_DONE = object()
+
+
+async def _async_chunks(chunks):
+    """
+    Pull chunks from a sync iterator one at a time. The pulls run on one
+    thread, which owns the server-side cursor.
+    """
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(chunks, _DONE)) is not _DONE:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def export_chunks(queryset, export_format):
+    """
+    Return an async iterator of encoded chunks for a StreamingHttpResponse.
+    Under ASGI a sync iterator would be read to the end before the first
+    chunk is sent.
+    """
+    _, chunks = EXPORT_FORMATS[export_format]
+    return _async_chunks(_buffered(chunks(export_rows(queryset))))
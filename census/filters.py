@@ -1,5 +1,6 @@
 import django_filters
 
+from .catalog import family_denomination_ids
 from .models import ReligiousBody
 
 
@@ -11,18 +12,32 @@ class ReligiousBodyFilter(django_filters.FilterSet):
     # This is the key change - make sure this matches your model relationship
     denomination = django_filters.NumberFilter(field_name="denomination__id")
 
+    bounds = django_filters.CharFilter(method="filter_bounds")
+
     def filter_family_census(self, queryset, name, value):
-        """Try both possible relationship paths to filter by family_census."""
-        # First try direct denomination
-        direct_filter = queryset.filter(denomination__family_census=value)
-        if direct_filter.exists():
-            return direct_filter
-        # Then try through census_record
-        return queryset.filter(census_record__denomination__family_census=value)
+        """Filter on the denomination ids in the family, using the FK index."""
+        return queryset.filter(
+            denomination_id__in=sorted(family_denomination_ids(value))
+        )
+
+    def filter_bounds(self, queryset, name, value):
+        """Limit to locations inside a "south,west,north,east" box."""
+        try:
+            south, west, north, east = map(float, value.split(","))
+        except ValueError:
+            # Ignore malformed bounds, as map_data does
+            return queryset
+        return queryset.filter(
+            location__lat__gte=south,
+            location__lat__lte=north,
+            location__lon__gte=west,
+            location__lon__lte=east,
+        )
 
     class Meta:
         model = ReligiousBody
         fields = [
             "denomination",
             "family_census",
+            "bounds",
         ]
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from census.columnar import write_analysis_snapshot
+
+
+class Command(BaseCommand):
+    help = "Write Parquet and Arrow snapshots of the joined census dataset"
+
+    def handle(self, *args, **options):
+        try:
+            names = write_analysis_snapshot()
+        except ImportError as e:
+            raise CommandError(str(e)) from e
+        for name in names.values():
+            self.stdout.write(self.style.SUCCESS(f"Wrote {name}."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from census.snapshots import write_marker_snapshots
+
+
+class Command(BaseCommand):
+    help = "Write precompressed static snapshots of the map marker data"
+
+    def handle(self, *args, **options):
+        manifest = write_marker_snapshots()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote marker snapshot {manifest['version']} "
+                f"({len(manifest['files'])} files)."
+            )
+        )
@@ -1,11 +1,14 @@
 import csv
+import logging
 import os
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 
-from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
+from census import rollups
 from census.models import (
     CensusSchedule,
     Clergy,
@@ -15,6 +18,8 @@ from census.models import (
 )
 from location.models import Location
 
+logger = logging.getLogger(__name__)
+
 # Constants for special values in the data
 MISSING = "MISSING"
 ILLEGIBLE = "ILLEGIBLE"
@@ -98,97 +103,110 @@ class Command(BaseCommand):
         reset = options["reset"]
 
         try:
-            # Reset the database if requested
-            if reset:
-                self.stdout.write("Deleting existing records...")
-                Clergy.objects.all().delete()
-                Membership.objects.all().delete()
-                ReligiousBody.objects.all().delete()
-                CensusSchedule.objects.all().delete()
-                self.stdout.write("Database reset complete.")
-
-            with open(options["csv_file"], "r") as file:
-                reader = csv.DictReader(file)
-
-                total_rows = (
-                    sum(1 for _ in open(options["csv_file"], "r")) - 1
-                )  # Subtract header
-                self.stdout.write(f"Found {total_rows} rows in the CSV file.")
-
-                for row in reader:
-                    try:
-                        with transaction.atomic():
-                            resource_id = row["resource_id"]
-                            self.stdout.write(
-                                f"\nProcessing row {resource_id} ({count + 1}/{total_rows})"
-                            )
-
-                            # Create CensusSchedule
-                            census_schedule = self._create_census_schedule(row)
-
-                            # Create ReligiousBody
-                            religious_body = self._create_religious_body(
-                                row, census_schedule
-                            )
+            # Rollups are rebuilt once after the import rather than per record
+            with rollups.suspended():
+                # Reset the database if requested
+                if reset:
+                    self.stdout.write("Deleting existing records...")
+                    Clergy.objects.all().delete()
+                    Membership.objects.all().delete()
+                    ReligiousBody.objects.all().delete()
+                    CensusSchedule.objects.all().delete()
+                    self.stdout.write("Database reset complete.")
+
+                with open(options["csv_file"], "r") as file:
+                    reader = csv.DictReader(file)
+
+                    total_rows = (
+                        sum(1 for _ in open(options["csv_file"], "r")) - 1
+                    )  # Subtract header
+                    self.stdout.write(f"Found {total_rows} rows in the CSV file.")
+
+                    for row in reader:
+                        try:
+                            with transaction.atomic():
+                                resource_id = row["resource_id"]
+                                self.stdout.write(
+                                    f"\nProcessing row {resource_id} ({count + 1}/{total_rows})"
+                                )
 
-                            # Create Membership
-                            self._create_membership(
-                                row, census_schedule, religious_body
-                            )
+                                # Create CensusSchedule
+                                census_schedule = self._create_census_schedule(row)
 
-                            # Create Clergy if present
-                            if (
-                                row.get("(25b) Name of Pastor")
-                                and row.get("(25b) Name of Pastor") != ""
-                                and row.get("(25b) Name of Pastor") != NULL
-                            ):
-                                self._create_clergy(
-                                    row,
-                                    census_schedule,
+                                # Create ReligiousBody
+                                religious_body = self._create_religious_body(
+                                    row, census_schedule
                                 )
 
-                            # Create Assistant Clergy if present
-                            assistant_pastors = row.get(
-                                "(26) Number of Assistant Pastors", "0"
-                            )
-                            if (
-                                assistant_pastors != "0"
-                                and assistant_pastors != MISSING
-                                and assistant_pastors != NULL
-                                and assistant_pastors != ""
-                                and row.get("Name of Assistant Pastor")
-                                and row.get("Name of Assistant Pastor")
-                                not in ["", NULL]
-                            ):
-                                self._create_clergy(
-                                    row,
-                                    census_schedule,
+                                # Create Membership
+                                self._create_membership(
+                                    row, census_schedule, religious_body
                                 )
 
-                            count += 1
-                            self.stdout.write(
-                                self.style.SUCCESS(
-                                    f"Successfully processed row {resource_id}"
+                                # Create Clergy if present
+                                if (
+                                    row.get("(25b) Name of Pastor")
+                                    and row.get("(25b) Name of Pastor") != ""
+                                    and row.get("(25b) Name of Pastor") != NULL
+                                ):
+                                    self._create_clergy(
+                                        row,
+                                        census_schedule,
+                                    )
+
+                                # Create Assistant Clergy if present
+                                assistant_pastors = row.get(
+                                    "(26) Number of Assistant Pastors", "0"
                                 )
-                            )
+                                if (
+                                    assistant_pastors != "0"
+                                    and assistant_pastors != MISSING
+                                    and assistant_pastors != NULL
+                                    and assistant_pastors != ""
+                                    and row.get("Name of Assistant Pastor")
+                                    and row.get("Name of Assistant Pastor")
+                                    not in ["", NULL]
+                                ):
+                                    self._create_clergy(
+                                        row,
+                                        census_schedule,
+                                    )
 
-                            if limit > 0 and count >= limit:
+                                count += 1
                                 self.stdout.write(
                                     self.style.SUCCESS(
-                                        f"Reached import limit of {limit} records."
+                                        f"Successfully processed row {resource_id}"
                                     )
                                 )
-                                break
 
-                    except Exception as e:
-                        self.log_error(
-                            f"Error processing row {row.get('resource_id', 'unknown')}: {str(e)}"
-                        )
-                        continue
+                                if limit > 0 and count >= limit:
+                                    self.stdout.write(
+                                        self.style.SUCCESS(
+                                            f"Reached import limit of {limit} records."
+                                        )
+                                    )
+                                    break
 
-            self.stdout.write(
-                self.style.SUCCESS(f"Import completed. Processed {count} records.")
-            )
+                        except Exception as e:
+                            self.log_error(
+                                f"Error processing row {row.get('resource_id', 'unknown')}: {str(e)}"
+                            )
+                            continue
+
+                self.stdout.write(
+                    self.style.SUCCESS(f"Import completed. Processed {count} records.")
+                )
+
+                # Refresh the aggregate tables and the static data files
+                call_command("rebuild_census_rollups", stdout=self.stdout)
+                call_command("build_marker_snapshots", stdout=self.stdout)
+
+                # The import itself succeeded, so a missing pyarrow is reported
+                # rather than raised
+                try:
+                    call_command("build_analysis_snapshot", stdout=self.stdout)
+                except CommandError as e:
+                    logger.error("Analysis snapshot was not written: %s", e)
 
         finally:
             self.error_log.close()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from census.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the census rollup tables from the imported records"
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} census rollup cells."))
@@ -0,0 +1,113 @@
+from django.db.models import Count, IntegerField, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .catalog import census_families
+from .models import ReligiousBody
+
+# Columns read for each map marker
+MARKER_COLUMNS = ("id", "location__lat", "location__lon", "denomination__family_census")
+
+
+def marker_queryset():
+    """
+    Base queryset for map markers: religious bodies that have a location.
+    """
+    return ReligiousBody.objects.filter(location__isnull=False)
+
+
+def marker_rows(queryset):
+    """Return (id, lat, lon, family name) tuples without building models."""
+    return queryset.values_list(*MARKER_COLUMNS)
+
+
+def compact_markers(rows):
+    """
+    Encode marker rows as {id, lat, lon, family}, where family is the index
+    of the census family in census_families() or None. Names and member
+    counts are loaded per marker when its popup opens.
+    """
+    codes = {family: index for index, family in enumerate(census_families())}
+    return [
+        {"id": pk, "lat": lat, "lon": lon, "family": codes.get(family)}
+        for pk, lat, lon, family in rows
+    ]
+
+
+def location_marker_rows(queryset, location_ids):
+    """
+    Return per-location, per-family counts and member totals for the bodies
+    at the given locations, grouped in SQL.
+    """
+    members = Coalesce(
+        "membership__total_members_by_sex",
+        Coalesce("membership__male_members", 0)
+        + Coalesce("membership__female_members", 0),
+    )
+    return (
+        queryset.filter(location_id__in=location_ids)
+        .order_by("location_id")
+        .values_list(
+            "location_id",
+            "location__lat",
+            "location__lon",
+            "denomination__family_census",
+        )
+        .annotate(count=Count("id", distinct=True), members=Sum(members))
+    )
+
+
+def compact_locations(rows):
+    """
+    Encode per-location rows as one point per place: {id, lat, lon, count,
+    members, family, families}, where id is the location id, family is the
+    code of the family with the most bodies there and families lists
+    [family code, count] pairs. Codes index census_families() as in
+    compact_markers.
+    """
+    codes = {family: index for index, family in enumerate(census_families())}
+    places = {}
+    for location_id, lat, lon, family, count, members in rows:
+        place = places.setdefault(
+            location_id,
+            {
+                "id": location_id,
+                "lat": lat,
+                "lon": lon,
+                "count": 0,
+                "members": 0,
+                "family": None,
+                "families": [],
+            },
+        )
+        place["count"] += count
+        place["members"] += members or 0
+        place["families"].append([codes.get(family), count])
+
+    for place in places.values():
+        place["families"].sort(key=lambda pair: -pair[1])
+        place["family"] = place["families"][0][0]
+    return list(places.values())
+
+
+def annotate_total_members(queryset):
+    """
+    Annotate total_members, summed over the body's memberships. Each
+    membership counts its recorded total if available, otherwise male plus
+    female members.
+    """
+    return queryset.annotate(
+        total_members=Coalesce(
+            Sum(
+                Coalesce(
+                    # First try to use the recorded total
+                    "membership__total_members_by_sex",
+                    # Then try to calculate from male/female components
+                    Coalesce("membership__male_members", 0)
+                    + Coalesce("membership__female_members", 0),
+                )
+            ),
+            # Default to 0 if the body has no membership
+            Value(0),
+            output_field=IntegerField(),
+        )
+    )
@@ -0,0 +1,41 @@
+import os
+
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.string_utils import ensure_leading_trailing_slash
+
+
+class SnapshotWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise middleware that also serves the marker snapshots in
+    MARKER_SNAPSHOT_ROOT.
+
+    Snapshots are rebuilt by build_marker_snapshots while the site is running,
+    so snapshot URLs are looked up on disk per request instead of only being
+    indexed at startup. Snapshot files live in content-hashed version
+    directories and are served as immutable.
+    """
+
+    def __init__(self, get_response=None, settings=settings):
+        # Set before WhiteNoise indexes STATIC_ROOT, which calls
+        # immutable_file_test
+        self.snapshot_prefix = ensure_leading_trailing_slash(
+            settings.MARKER_SNAPSHOT_URL
+        )
+        super().__init__(get_response, settings=settings)
+        snapshot_root = os.path.join(os.path.abspath(settings.MARKER_SNAPSHOT_ROOT), "")
+        self.directories.append((snapshot_root, self.snapshot_prefix))
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.snapshot_prefix):
+            static_file = self.find_file(request.path_info)
+            if static_file is not None:
+                return self.serve(static_file, request)
+        return super().__call__(request)
+
+    def immutable_file_test(self, path, url):
+        if url.startswith(self.snapshot_prefix):
+            # Only files inside a version directory are immutable, not the
+            # manifest that points at the current version
+            return "/" in url[len(self.snapshot_prefix) :]
+        return super().immutable_file_test(path, url)
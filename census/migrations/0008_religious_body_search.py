@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:58
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("census", "0007_alter_historicalreligiousbody_division_and_more"),
+        ("location", "0002_alter_historicallocation_place_id_and_more"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="religiousbody",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.CombinedSearchVector(
+                        django.contrib.postgres.search.SearchVector(
+                            "name", config="english", weight="A"
+                        ),
+                        "||",
+                        django.contrib.postgres.search.SearchVector(
+                            "address", config="english", weight="B"
+                        ),
+                        django.contrib.postgres.search.SearchConfig("english"),
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        "census_code", config="simple", weight="C"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("english"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="denomination",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"), name="gin_trgm_ops"
+                ),
+                name="denomination_name_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="religiousbody",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="religiousbody_search_gin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="religiousbody",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"), name="gin_trgm_ops"
+                ),
+                name="religiousbody_name_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="religiousbody",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("address"),
+                    name="gin_trgm_ops",
+                ),
+                name="religiousbody_address_trgm",
+            ),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("census", "0008_religious_body_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CensusRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("state", models.CharField(blank=True, max_length=2)),
+                ("county", models.CharField(blank=True, max_length=50)),
+                ("family_census", models.CharField(max_length=255, null=True)),
+                ("religious_body_count", models.IntegerField(default=0)),
+                ("num_edifices", models.IntegerField(default=0)),
+                (
+                    "edifice_value",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                (
+                    "edifice_debt",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                (
+                    "residence_value",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                (
+                    "residence_debt",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                (
+                    "expenses",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                (
+                    "benevolences",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                (
+                    "total_expenditures",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                ("members", models.IntegerField(default=0)),
+                ("male_members", models.IntegerField(default=0)),
+                ("female_members", models.IntegerField(default=0)),
+                ("total_members_by_sex", models.IntegerField(default=0)),
+                ("members_under_13", models.IntegerField(default=0)),
+                ("members_13_and_older", models.IntegerField(default=0)),
+                ("total_members_by_age", models.IntegerField(default=0)),
+                ("sunday_school_num_officers_teachers", models.IntegerField(default=0)),
+                ("sunday_school_num_scholars", models.IntegerField(default=0)),
+                ("vbs_num_officers_teachers", models.IntegerField(default=0)),
+                ("vbs_num_scholars", models.IntegerField(default=0)),
+                ("weekday_num_officers_teachers", models.IntegerField(default=0)),
+                ("weekday_num_scholars", models.IntegerField(default=0)),
+                ("parochial_num_administrators", models.IntegerField(default=0)),
+                ("parochial_num_elementary_teachers", models.IntegerField(default=0)),
+                ("parochial_num_secondary_teachers", models.IntegerField(default=0)),
+                ("parochial_num_elementary_scholars", models.IntegerField(default=0)),
+                ("parochial_num_secondary_scholars", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "denomination",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to="census.denomination",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Census Rollup",
+                "verbose_name_plural": "Census Rollups",
+                "indexes": [
+                    models.Index(
+                        fields=["state", "county"], name="census_cens_state_57dd0c_idx"
+                    ),
+                    models.Index(
+                        fields=["family_census"], name="census_cens_family__528417_idx"
+                    ),
+                    models.Index(
+                        fields=["denomination"], name="census_cens_denomin_269125_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
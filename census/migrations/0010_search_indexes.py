@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:25
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("census", "0009_census_rollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="denomination",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("denomination_id"),
+                    name="gin_trgm_ops",
+                ),
+                name="denomination_id_trgm",
+            ),
+        ),
+    ]
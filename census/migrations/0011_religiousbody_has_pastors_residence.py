@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("census", "0010_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="historicalreligiousbody",
+            name="has_pastors_residence",
+            field=models.BooleanField(
+                blank=True,
+                help_text="Set to Unknown if missing, illegible, or unknown.",
+                null=True,
+                verbose_name="Ownership of pastor's residence",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="religiousbody",
+            name="has_pastors_residence",
+            field=models.BooleanField(
+                blank=True,
+                help_text="Set to Unknown if missing, illegible, or unknown.",
+                null=True,
+                verbose_name="Ownership of pastor's residence",
+            ),
+        ),
+    ]
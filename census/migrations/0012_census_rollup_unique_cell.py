@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:44
+
+from django.db import migrations, models
+
+
+def remove_duplicate_cells(apps, schema_editor):
+    # Overlapping refreshes could insert a cell twice. Both copies were
+    # computed from the fact tables, so keeping either one is correct.
+    CensusRollup = apps.get_model("census", "CensusRollup")
+    duplicates = (
+        CensusRollup.objects.values("state", "county", "denomination")
+        .annotate(count=models.Count("id"), keep=models.Max("id"))
+        .filter(count__gt=1)
+    )
+    for row in duplicates:
+        CensusRollup.objects.filter(
+            state=row["state"],
+            county=row["county"],
+            denomination=row["denomination"],
+        ).exclude(id=row["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("census", "0011_religiousbody_has_pastors_residence"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_cells, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="censusrollup",
+            constraint=models.UniqueConstraint(
+                fields=("state", "county", "denomination"),
+                name="census_rollup_unique_cell",
+                nulls_distinct=False,
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("census", "0012_census_rollup_unique_cell"),
+        ("location", "0003_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="historicalreligiousbody",
+            name="location",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                help_text="Start typing a city, county or state to search for a location.",
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="location.location",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="religiousbody",
+            name="location",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Start typing a city, county or state to search for a location.",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="location.location",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def populate_rollups(apps, schema_editor):
+    # Databases imported before the rollups existed would report empty
+    # statistics until the next import. This runs the rebuild_census_rollups
+    # routine, which upserts on the unique cell constraint from 0012.
+    from census import rollups
+
+    rollups.rebuild()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("census", "0013_religiousbody_location_help_text"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:04
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("census", "0014_populate_census_rollups"),
+        ("location", "0003_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="religiousbody",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("census_code"),
+                    name="gin_trgm_ops",
+                ),
+                name="religiousbody_census_code_trgm",
+            ),
+        ),
+    ]
@@ -1,4 +1,7 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 from simple_history.models import HistoricalRecords
 
 from location.models import Location
@@ -47,6 +50,18 @@ class Denomination(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     history = HistoricalRecords()
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="denomination_name_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("denomination_id"), name="gin_trgm_ops"),
+                name="denomination_id_trgm",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -129,7 +144,7 @@ class ReligiousBody(models.Model):
         on_delete=models.CASCADE,
         blank=True,
         null=True,
-        help_text="Use the magnifying glass to the right to search for a location. Do not manually edit this number.",
+        help_text="Start typing a city, county or state to search for a location.",
     )
     urban_rural_code = models.CharField(
         blank=True, null=True, max_length=50, verbose_name="Urban/rural code"
@@ -209,10 +224,19 @@ class ReligiousBody(models.Model):
         help_text="Leave blank if information is missing or illegible",
     )
 
+    # Full-text search document, maintained by PostgreSQL as a generated column
+    search_vector = models.GeneratedField(
+        expression=SearchVector("name", weight="A", config="english")
+        + SearchVector("address", weight="B", config="english")
+        + SearchVector("census_code", weight="C", config="simple"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
     # Record keeping
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    history = HistoricalRecords()
+    history = HistoricalRecords(excluded_fields=["search_vector"])
 
     def __str__(self):
         # if name return name, otherwise "no name provided"
@@ -225,6 +249,19 @@ class ReligiousBody(models.Model):
         indexes = [
             models.Index(fields=["denomination"]),
             models.Index(fields=["location"]),
+            GinIndex(fields=["search_vector"], name="religiousbody_search_gin"),
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="religiousbody_name_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("address"), name="gin_trgm_ops"),
+                name="religiousbody_address_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("census_code"), name="gin_trgm_ops"),
+                name="religiousbody_census_code_trgm",
+            ),
         ]
 
 
@@ -408,3 +445,78 @@ class Clergy(models.Model):
 
     class Meta:
         verbose_name_plural = "Clergy"
+
+
+class CensusRollup(models.Model):
+    """
+    Precomputed totals for one (state, county, family, denomination) cell.
+    Rebuilt in bulk after imports and kept current from save/delete signals,
+    so aggregate queries do not have to join the fact tables.
+    """
+
+    # Religious bodies without a location are rolled up under a blank
+    # state and county
+    state = models.CharField(max_length=2, blank=True)
+    county = models.CharField(max_length=50, blank=True)
+    family_census = models.CharField(null=True, max_length=255)
+    denomination = models.ForeignKey(
+        Denomination,
+        on_delete=models.CASCADE,
+        related_name="rollups",
+        null=True,
+    )
+
+    # Religious body totals
+    religious_body_count = models.IntegerField(default=0)
+    num_edifices = models.IntegerField(default=0)
+    edifice_value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    edifice_debt = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    residence_value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    residence_debt = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    expenses = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    benevolences = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_expenditures = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    # Membership totals; members prefers the recorded total by sex and falls
+    # back to male plus female members, as the map does
+    members = models.IntegerField(default=0)
+    male_members = models.IntegerField(default=0)
+    female_members = models.IntegerField(default=0)
+    total_members_by_sex = models.IntegerField(default=0)
+    members_under_13 = models.IntegerField(default=0)
+    members_13_and_older = models.IntegerField(default=0)
+    total_members_by_age = models.IntegerField(default=0)
+    sunday_school_num_officers_teachers = models.IntegerField(default=0)
+    sunday_school_num_scholars = models.IntegerField(default=0)
+    vbs_num_officers_teachers = models.IntegerField(default=0)
+    vbs_num_scholars = models.IntegerField(default=0)
+    weekday_num_officers_teachers = models.IntegerField(default=0)
+    weekday_num_scholars = models.IntegerField(default=0)
+    parochial_num_administrators = models.IntegerField(default=0)
+    parochial_num_elementary_teachers = models.IntegerField(default=0)
+    parochial_num_secondary_teachers = models.IntegerField(default=0)
+    parochial_num_elementary_scholars = models.IntegerField(default=0)
+    parochial_num_secondary_scholars = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.denomination or 'Unknown'}, {self.county}, {self.state}"
+
+    class Meta:
+        verbose_name = "Census Rollup"
+        verbose_name_plural = "Census Rollups"
+
+        indexes = [
+            models.Index(fields=["state", "county"]),
+            models.Index(fields=["family_census"]),
+            models.Index(fields=["denomination"]),
+        ]
+        constraints = [
+            # One row per cell, counting bodies without a denomination once
+            models.UniqueConstraint(
+                fields=["state", "county", "denomination"],
+                name="census_rollup_unique_cell",
+                nulls_distinct=False,
+            ),
+        ]
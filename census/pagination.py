@@ -0,0 +1,45 @@
+import base64
+import binascii
+
+from rest_framework.pagination import CursorPagination
+
+
+def encode_cursor(last_id):
+    """
+    Encode the id of the last row on a page as an opaque cursor string.
+    Clients should pass the value back unchanged to fetch the next page.
+    """
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor back into the last seen id.
+    Raises ValueError if the cursor is malformed.
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        prefix, _, value = base64.urlsafe_b64decode(padded).decode().partition(":")
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if prefix != "id" or not value.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return int(value)
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Cursor pagination ordered on the primary key, so each page is an index
+    range scan and response size is bounded regardless of table size.
+    """
+
+    ordering = "id"
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        # Ranked search results page best match first, with id breaking ties
+        if "search_rank" in queryset.query.annotations:
+            return ("-search_rank", "id")
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,188 @@
+import logging
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from . import stats
+from .models import CensusRollup, Membership, ReligiousBody
+
+logger = logging.getLogger(__name__)
+
+# Numeric fields summed into each rollup cell
+RELIGIOUS_BODY_FIELDS = [
+    "num_edifices",
+    "edifice_value",
+    "edifice_debt",
+    "residence_value",
+    "residence_debt",
+    "expenses",
+    "benevolences",
+    "total_expenditures",
+]
+MEMBERSHIP_FIELDS = [
+    "male_members",
+    "female_members",
+    "total_members_by_sex",
+    "members_under_13",
+    "members_13_and_older",
+    "total_members_by_age",
+    "sunday_school_num_officers_teachers",
+    "sunday_school_num_scholars",
+    "vbs_num_officers_teachers",
+    "vbs_num_scholars",
+    "weekday_num_officers_teachers",
+    "weekday_num_scholars",
+    "parochial_num_administrators",
+    "parochial_num_elementary_teachers",
+    "parochial_num_secondary_teachers",
+    "parochial_num_elementary_scholars",
+    "parochial_num_secondary_scholars",
+]
+
+# Fields written when a cell is upserted over an existing row
+CELL_FIELDS = [
+    "family_census",
+    "religious_body_count",
+    *RELIGIOUS_BODY_FIELDS,
+    "members",
+    *MEMBERSHIP_FIELDS,
+    "updated_at",
+]
+
+# Set while a bulk import runs, so the signal handlers leave the rollups to
+# the rebuild at the end of the import
+_suspended = 0
+
+
+@contextmanager
+def suspended():
+    """Skip incremental rollup updates inside the block."""
+    global _suspended
+    _suspended += 1
+    try:
+        yield
+    finally:
+        _suspended -= 1
+
+
+def is_suspended():
+    return _suspended > 0
+
+
+def _keyed_bodies():
+    return ReligiousBody.objects.annotate(
+        state=Coalesce("location__state", Value("")),
+        county=Coalesce("location__county", Value("")),
+    )
+
+
+def _keyed_memberships():
+    return Membership.objects.filter(religious_body__isnull=False).annotate(
+        state=Coalesce("religious_body__location__state", Value("")),
+        county=Coalesce("religious_body__location__county", Value("")),
+        denomination_id=F("religious_body__denomination_id"),
+    )
+
+
+def body_keys(queryset):
+    """Return the (state, county, denomination id) cells of some bodies."""
+    return set(
+        _keyed_bodies()
+        .filter(pk__in=queryset.values("pk"))
+        .values_list("state", "county", "denomination_id")
+        .distinct()
+    )
+
+
+def _key_filter(keys):
+    condition = Q()
+    for state, county, denomination_id in keys:
+        condition |= Q(state=state, county=county, denomination_id=denomination_id)
+    return condition
+
+
+def _build_cells(condition):
+    """Aggregate the fact tables into unsaved rollup cells."""
+    cells = {}
+    bodies = (
+        _keyed_bodies()
+        .filter(condition)
+        .order_by()
+        .values("state", "county", "denomination_id", "denomination__family_census")
+        .annotate(
+            religious_body_count=Count("id"),
+            **{name: Sum(name) for name in RELIGIOUS_BODY_FIELDS},
+        )
+    )
+    for row in bodies:
+        key = (row["state"], row["county"], row["denomination_id"])
+        cells[key] = CensusRollup(
+            state=row["state"],
+            county=row["county"],
+            denomination_id=row["denomination_id"],
+            family_census=row["denomination__family_census"],
+            religious_body_count=row["religious_body_count"],
+            **{name: row[name] or 0 for name in RELIGIOUS_BODY_FIELDS},
+        )
+
+    memberships = (
+        _keyed_memberships()
+        .filter(condition)
+        .order_by()
+        .values("state", "county", "denomination_id")
+        .annotate(
+            members=Sum(
+                Coalesce(
+                    "total_members_by_sex",
+                    Coalesce("male_members", 0) + Coalesce("female_members", 0),
+                )
+            ),
+            **{name: Sum(name) for name in MEMBERSHIP_FIELDS},
+        )
+    )
+    for row in memberships:
+        cell = cells.get((row["state"], row["county"], row["denomination_id"]))
+        if cell is None:
+            continue
+        cell.members = row["members"] or 0
+        for name in MEMBERSHIP_FIELDS:
+            setattr(cell, name, row[name] or 0)
+
+    return list(cells.values())
+
+
+def _replace_cells(condition, cells):
+    """
+    Replace the rollup cells matching condition. Cells are upserted, so when
+    two refreshes of the same cell overlap the later one overwrites the row
+    the other inserted.
+    """
+    with transaction.atomic():
+        CensusRollup.objects.filter(condition).delete()
+        CensusRollup.objects.bulk_create(
+            cells,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["state", "county", "denomination"],
+            update_fields=CELL_FIELDS,
+        )
+        transaction.on_commit(stats.invalidate)
+
+
+def rebuild():
+    """Replace every rollup cell from the fact tables. Returns the cell count."""
+    cells = _build_cells(Q())
+    _replace_cells(Q(), cells)
+    logger.info("Rebuilt %d census rollup cells", len(cells))
+    return len(cells)
+
+
+def refresh(keys):
+    """Recompute the given (state, county, denomination id) cells."""
+    keys = {key for key in keys if key is not None}
+    if not keys or is_suspended():
+        return
+    condition = _key_filter(keys)
+    _replace_cells(condition, _build_cells(condition))
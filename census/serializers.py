@@ -1,19 +1,38 @@
 from rest_framework import serializers
 
 from location.models import Location
+from religious_ecologies.middleware import timing
 
 from .models import Denomination, Membership, ReligiousBody
 
 
-class MapMarkerSerializer(serializers.ModelSerializer):
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timing(self.context.get("request"), "serialize"):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Report the time spent building .data in the "serialize" Server-Timing
+    entry of the request in the serializer context. Lists are timed as a
+    whole when Meta.list_serializer_class is TimedListSerializer.
+    """
+
+    @property
+    def data(self):
+        with timing(self.context.get("request"), "serialize"):
+            return super().data
+
+
+class MarkerSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
-    Lightweight serializer specifically for map marker data.
-    Only includes fields needed for map display to reduce overhead.
+    Popup details for a single map marker, loaded when the popup opens so the
+    bulk marker data can leave out names and member counts.
     """
 
-    # Location data
-    lat = serializers.SerializerMethodField()
-    lon = serializers.SerializerMethodField()
+    place = serializers.SerializerMethodField()
 
     # Denomination data
     family = serializers.SerializerMethodField()
@@ -27,21 +46,15 @@ class MapMarkerSerializer(serializers.ModelSerializer):
         fields = [
             "id",
             "name",
-            "lat",
-            "lon",
+            "place",
             "family",
             "denomination_name",
             "total_members",
         ]
 
-    def get_lat(self, obj):
+    def get_place(self, obj):
         if obj.location:
-            return obj.location.lat
-        return None
-
-    def get_lon(self, obj):
-        if obj.location:
-            return obj.location.lon
+            return str(obj.location)
         return None
 
     def get_family(self, obj):
@@ -75,9 +88,10 @@ class LocationSerializer(serializers.ModelSerializer):
         ]
 
 
-class DenominationSerializer(serializers.ModelSerializer):
+class DenominationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Denomination
+        list_serializer_class = TimedListSerializer
         fields = ["id", "denomination_id", "name", "family_census", "family_relec"]
 
 
@@ -105,7 +119,7 @@ class MembershipSerializer(serializers.ModelSerializer):
         ]
 
 
-class ReligiousBodySerializer(serializers.ModelSerializer):
+class ReligiousBodySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     location_details = LocationSerializer(source="location", read_only=True)
     denomination_details = DenominationSerializer(source="denomination", read_only=True)
     membership_details = serializers.SerializerMethodField()
@@ -114,6 +128,7 @@ class ReligiousBodySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ReligiousBody
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "name",
@@ -137,9 +152,62 @@ class ReligiousBodySerializer(serializers.ModelSerializer):
             "pastors",
         ]
 
+    # Nested and computed fields that need joins or prefetches. They are all
+    # included by default; once ?fields= or ?expand= is given, only the ones
+    # named in either parameter are.
+    expandable_fields = [
+        "location_details",
+        "denomination_details",
+        "membership_details",
+        "total_members",
+        "pastors",
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get("selected_fields")
+        if selected is not None:
+            for name in set(self.fields) - selected:
+                self.fields.pop(name)
+
+    @classmethod
+    def select_fields(cls, fields=None, expand=None):
+        """
+        Return the field names to include for the ?fields= and ?expand= query
+        parameters, or None to include every field. ?fields= narrows the plain
+        fields (id is always kept) and ?expand= adds nested fields.
+        """
+        if not fields and not expand:
+            return None
+
+        requested = {
+            name.strip()
+            for value in (fields, expand)
+            if value
+            for name in value.split(",")
+        }
+        if fields:
+            selected = {"id"} | (requested & set(cls.Meta.fields))
+        else:
+            selected = set(cls.Meta.fields) - set(cls.expandable_fields)
+            selected |= requested & set(cls.expandable_fields)
+        return selected
+
+    def _membership(self, obj):
+        """Return the first membership record from the prefetched rows."""
+        memberships = obj.membership.all()
+        return memberships[0] if memberships else None
+
+    def _pastor(self, obj):
+        """Return the first non-assistant clergy from the prefetched rows."""
+        pastors = getattr(obj.census_record, "pastor_list", None)
+        if pastors is None:
+            pastors = obj.census_record.clergy.filter(is_assistant=False)[:1]
+        return pastors[0] if pastors else None
+
     def get_membership_details(self, obj):
         try:
-            membership = Membership.objects.filter(religious_body=obj).first()
+            membership = self._membership(obj)
             if membership:
                 # Handle NULL values properly
                 male = membership.male_members or 0
@@ -173,7 +241,7 @@ class ReligiousBodySerializer(serializers.ModelSerializer):
 
     def get_total_members(self, obj):
         try:
-            membership = Membership.objects.filter(religious_body=obj).first()
+            membership = self._membership(obj)
             if membership:
                 # Use recorded total if available
                 if membership.total_members_by_sex is not None:
@@ -193,7 +261,7 @@ class ReligiousBodySerializer(serializers.ModelSerializer):
 
     def get_pastors(self, obj):
         try:
-            clergy = obj.census_record.clergy.filter(is_assistant=False).first()
+            clergy = self._pastor(obj)
             if clergy:
                 return {
                     "name": clergy.name,
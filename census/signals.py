@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from location.models import Location
+
+from . import catalog, rollups, stats
+from .models import CensusRollup, Denomination, Membership, ReligiousBody
+
+
+@receiver([post_save, post_delete], sender=Denomination)
+def invalidate_denomination_catalog(sender, **kwargs):
+    catalog.invalidate()
+
+
+@receiver(post_save, sender=Denomination)
+def update_rollup_family(sender, instance, **kwargs):
+    # The family is denormalised onto the rollups, the totals are unchanged
+    if not rollups.is_suspended():
+        CensusRollup.objects.filter(denomination=instance).exclude(
+            family_census=instance.family_census
+        ).update(family_census=instance.family_census)
+        transaction.on_commit(stats.invalidate)
+
+
+def _rollup_keys(instance):
+    """Rollup cells a religious body or membership currently counts towards."""
+    if isinstance(instance, Membership):
+        if instance.religious_body_id is None:
+            return set()
+        queryset = ReligiousBody.objects.filter(pk=instance.religious_body_id)
+    else:
+        queryset = ReligiousBody.objects.filter(pk=instance.pk)
+    return rollups.body_keys(queryset)
+
+
+@receiver([pre_save, pre_delete], sender=ReligiousBody)
+@receiver([pre_save, pre_delete], sender=Membership)
+def remember_rollup_keys(sender, instance, **kwargs):
+    # Capture the cells before the change, so that moving a record to
+    # another location or denomination also refreshes the cell it left
+    if rollups.is_suspended() or instance.pk is None:
+        instance._rollup_keys = set()
+    elif isinstance(instance, Membership):
+        # religious_body_id already holds the new body, so read the stored one
+        instance._rollup_keys = rollups.body_keys(
+            ReligiousBody.objects.filter(membership=instance.pk)
+        )
+    else:
+        instance._rollup_keys = _rollup_keys(instance)
+
+
+@receiver([post_save, post_delete], sender=ReligiousBody)
+@receiver([post_save, post_delete], sender=Membership)
+def refresh_rollups(sender, instance, **kwargs):
+    if rollups.is_suspended():
+        return
+    keys = set(getattr(instance, "_rollup_keys", ()))
+    if kwargs["signal"] is post_save:
+        keys |= _rollup_keys(instance)
+    rollups.refresh(keys)
+
+
+@receiver(pre_save, sender=Location)
+def remember_location_rollup_keys(sender, instance, **kwargs):
+    instance._rollup_keys = set()
+    if rollups.is_suspended() or instance.pk is None:
+        return
+    previous = (
+        Location.objects.filter(pk=instance.pk).values_list("state", "county").first()
+    )
+    if previous and previous != (instance.state, instance.county):
+        instance._rollup_keys = rollups.body_keys(
+            ReligiousBody.objects.filter(location=instance)
+        )
+
+
+@receiver(post_save, sender=Location)
+def refresh_location_rollups(sender, instance, **kwargs):
+    keys = getattr(instance, "_rollup_keys", set())
+    if keys and not rollups.is_suspended():
+        rollups.refresh(
+            keys | rollups.body_keys(ReligiousBody.objects.filter(location=instance))
+        )
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.utils.text import slugify
+from whitenoise.compress import Compressor
+
+from .catalog import census_families
+from .markers import compact_markers, marker_queryset, marker_rows
+from .models import Membership, ReligiousBody
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# File with every religious body in columns, for filtering in the browser
+DATASET_NAME = "dataset.json"
+
+# Number of snapshot versions kept on disk, so that pages rendered just before
+# a rebuild can still fetch the files they reference
+KEEP_VERSIONS = 2
+
+
+def _encode(families, rows):
+    """Encode marker rows in the same shape as a final map_data page."""
+    return json.dumps(
+        {"families": families, "results": compact_markers(rows), "next_cursor": None},
+        cls=DjangoJSONEncoder,
+        separators=(",", ":"),
+    ).encode()
+
+
+def build_dataset_payload(families):
+    """
+    Encode all religious bodies as parallel columns: id, lat, lon, family
+    code, denomination id, members, edifice value and edifice debt. The map
+    loads this once and filters and totals it in the browser.
+    """
+    codes = {family: index for index, family in enumerate(families)}
+    members = dict(
+        Membership.objects.filter(religious_body__isnull=False)
+        .order_by()
+        .values("religious_body_id")
+        .annotate(
+            members=Sum(
+                Coalesce(
+                    "total_members_by_sex",
+                    Coalesce("male_members", 0) + Coalesce("female_members", 0),
+                )
+            )
+        )
+        .values_list("religious_body_id", "members")
+    )
+    columns = {
+        "id": [],
+        "lat": [],
+        "lon": [],
+        "family": [],
+        "denomination": [],
+        "members": [],
+        "edifice_value": [],
+        "edifice_debt": [],
+    }
+    rows = ReligiousBody.objects.order_by("id").values_list(
+        "id",
+        "location__lat",
+        "location__lon",
+        "denomination__family_census",
+        "denomination_id",
+        "edifice_value",
+        "edifice_debt",
+    )
+    for pk, lat, lon, family, denomination, value, debt in rows:
+        columns["id"].append(pk)
+        columns["lat"].append(lat)
+        columns["lon"].append(lon)
+        columns["family"].append(codes.get(family))
+        columns["denomination"].append(denomination)
+        columns["members"].append(members.get(pk) or 0)
+        columns["edifice_value"].append(float(value or 0))
+        columns["edifice_debt"].append(float(debt or 0))
+
+    return json.dumps({"families": families, **columns}, separators=(",", ":")).encode()
+
+
+def build_marker_payloads():
+    """
+    Build the marker data for all religious bodies and for each census
+    family from a single query. Returns a dict of snapshot key to
+    (filename, JSON bytes).
+    """
+    rows = list(marker_rows(marker_queryset().order_by("id")))
+    families = census_families()
+
+    by_family = {}
+    for row in rows:
+        by_family.setdefault(row[3], []).append(row)
+
+    payloads = {"all": ("all.json", _encode(families, rows))}
+    for index, family in enumerate(families):
+        if family not in by_family:
+            continue
+        filename = f"family-{index}-{slugify(family) or 'unnamed'}.json"
+        payloads[family] = (filename, _encode(families, by_family[family]))
+
+    return payloads
+
+
+def write_marker_snapshots(root=None):
+    """
+    Write versioned, precompressed marker snapshots and point the manifest at
+    them. The version is a hash of the content, so an unchanged dataset keeps
+    its version and browser caches stay valid.
+    """
+    root = root or settings.MARKER_SNAPSHOT_ROOT
+    payloads = build_marker_payloads()
+
+    digest = hashlib.sha256()
+    for key in sorted(payloads):
+        filename, content = payloads[key]
+        digest.update(filename.encode())
+        digest.update(content)
+    dataset = build_dataset_payload(census_families())
+    digest.update(dataset)
+    version = digest.hexdigest()[:12]
+
+    version_dir = os.path.join(root, version)
+    if not os.path.isdir(version_dir):
+        tmp_dir = f"{version_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        compressor = Compressor(quiet=True)
+        for filename, content in [*payloads.values(), (DATASET_NAME, dataset)]:
+            path = os.path.join(tmp_dir, filename)
+            with open(path, "wb") as f:
+                f.write(content)
+            for _ in compressor.compress(path):
+                pass
+
+        os.rename(tmp_dir, version_dir)
+
+    manifest = {
+        "version": version,
+        "files": {
+            key: f"{version}/{filename}" for key, (filename, _) in payloads.items()
+        },
+        "dataset": f"{version}/{DATASET_NAME}",
+    }
+    manifest_path = os.path.join(root, MANIFEST_NAME)
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    _prune_versions(root, version)
+    logger.info("Wrote marker snapshot %s (%d files)", version, len(payloads))
+    return manifest
+
+
+def _prune_versions(root, current):
+    """Remove old snapshot versions beyond KEEP_VERSIONS."""
+    versions = sorted(
+        (
+            entry
+            for entry in os.scandir(root)
+            if entry.is_dir() and entry.name != current
+        ),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in versions[KEEP_VERSIONS - 1 :]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def load_manifest():
+    """
+    Return the current snapshot manifest with file URLs, or None if no
+    snapshot has been built.
+    """
+    path = os.path.join(settings.MARKER_SNAPSHOT_ROOT, MANIFEST_NAME)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    return {
+        "version": manifest["version"],
+        "files": {
+            key: f"{settings.MARKER_SNAPSHOT_URL}{name}"
+            for key, name in manifest["files"].items()
+        },
+        "dataset": (
+            f"{settings.MARKER_SNAPSHOT_URL}{manifest['dataset']}"
+            if "dataset" in manifest
+            else None
+        ),
+    }
@@ -0,0 +1,152 @@
+// Clusters the census map's markers off the main thread.
+//
+// The index is a hierarchy of grids, one per zoom level. Starting from the
+// points at MAX_ZOOM + 1, each level merges the items of the level above that
+// fall in the same grid cell into one cluster at their weighted centre. A
+// query returns the items of one level inside the visible bounds.
+//
+// Messages in:
+//   {type: 'index', generation, ids: Int32Array, lat: Float64Array, lon: Float64Array,
+//    weights: Int32Array}
+//   {type: 'query', generation, bbox: [west, south, east, north], zoom}
+// Messages out:
+//   {type: 'indexed', generation}
+//   {type: 'clusters', generation, clusters: [{id, lat, lon, count, expansion_zoom}]}
+// where id is the marker id of a single point and null for a cluster. A
+// cluster's count is the sum of its points' weights.
+
+// Cluster radius in pixels and tile size
+const RADIUS = 60;
+const EXTENT = 256;
+
+// Points are never clustered above this zoom level
+const MAX_ZOOM = 16;
+
+let levels = [];
+let generation = 0;
+
+// Spherical Mercator projection to the unit square
+function projectX(lon) {
+    return lon / 360 + 0.5;
+}
+
+function projectY(lat) {
+    const sin = Math.sin(lat * Math.PI / 180);
+    const y = 0.5 - 0.25 * Math.log((1 + sin) / (1 - sin)) / Math.PI;
+    return Math.min(Math.max(y, 0), 1);
+}
+
+function unprojectLon(x) {
+    return (x - 0.5) * 360;
+}
+
+function unprojectLat(y) {
+    const y2 = (180 - y * 360) * Math.PI / 180;
+    return 360 * Math.atan(Math.exp(y2)) / Math.PI - 90;
+}
+
+function emptyLevel() {
+    return {x: [], y: [], count: [], id: [], expansion: []};
+}
+
+// Merge the items of one level by grid cell at the given zoom
+function clusterLevel(items, zoom) {
+    const cell = RADIUS / (EXTENT * Math.pow(2, zoom));
+    const cells = new Map();
+    for (let i = 0; i < items.x.length; i++) {
+        const key = Math.floor(items.x[i] / cell) * 1e6 + Math.floor(items.y[i] / cell);
+        const members = cells.get(key);
+        if (members) {
+            members.push(i);
+        } else {
+            cells.set(key, [i]);
+        }
+    }
+
+    const level = emptyLevel();
+    cells.forEach(members => {
+        if (members.length === 1) {
+            // A lone item is carried down unchanged
+            const i = members[0];
+            level.x.push(items.x[i]);
+            level.y.push(items.y[i]);
+            level.count.push(items.count[i]);
+            level.id.push(items.id[i]);
+            level.expansion.push(items.expansion[i]);
+            return;
+        }
+        let x = 0;
+        let y = 0;
+        let count = 0;
+        members.forEach(i => {
+            x += items.x[i] * items.count[i];
+            y += items.y[i] * items.count[i];
+            count += items.count[i];
+        });
+        level.x.push(x / count);
+        level.y.push(y / count);
+        level.count.push(count);
+        level.id.push(null);
+        // The cluster splits into its members one zoom level in
+        level.expansion.push(zoom + 1);
+    });
+    return level;
+}
+
+function buildIndex(ids, lat, lon, weights) {
+    const points = emptyLevel();
+    for (let i = 0; i < ids.length; i++) {
+        points.x.push(projectX(lon[i]));
+        points.y.push(projectY(lat[i]));
+        points.count.push(weights ? weights[i] : 1);
+        points.id.push(ids[i]);
+        points.expansion.push(MAX_ZOOM + 1);
+    }
+
+    levels = new Array(MAX_ZOOM + 2);
+    levels[MAX_ZOOM + 1] = points;
+    for (let zoom = MAX_ZOOM; zoom >= 0; zoom--) {
+        levels[zoom] = clusterLevel(levels[zoom + 1], zoom);
+    }
+}
+
+function query(bbox, zoom) {
+    const level = levels[Math.min(Math.max(Math.round(zoom), 0), MAX_ZOOM + 1)];
+    if (!level) {
+        return [];
+    }
+    const west = projectX(Math.max(bbox[0], -180));
+    const east = projectX(Math.min(bbox[2], 180));
+    const north = projectY(bbox[3]);
+    const south = projectY(bbox[1]);
+
+    const clusters = [];
+    for (let i = 0; i < level.x.length; i++) {
+        if (level.x[i] < west || level.x[i] > east || level.y[i] < north || level.y[i] > south) {
+            continue;
+        }
+        clusters.push({
+            id: level.id[i],
+            lat: unprojectLat(level.y[i]),
+            lon: unprojectLon(level.x[i]),
+            count: level.count[i],
+            expansion_zoom: level.expansion[i]
+        });
+    }
+    return clusters;
+}
+
+self.onmessage = function(event) {
+    const message = event.data;
+    if (message.type === 'index') {
+        buildIndex(message.ids, message.lat, message.lon, message.weights);
+        generation = message.generation;
+        self.postMessage({type: 'indexed', generation});
+    } else if (message.type === 'query') {
+        self.postMessage({
+            type: 'clusters',
+            generation,
+            clusters: query(message.bbox, message.zoom)
+        });
+    }
+};
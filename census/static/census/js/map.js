@@ -0,0 +1,1099 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Initialize the map
+    const map = L.map('map').setView([39.8283, -98.5795], 4); // Centered on US
+
+    // Add tile layer (OpenStreetMap)
+    L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+        attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
+    }).addTo(map);
+
+    // Every loaded marker is kept in individualMarkers, which is on the map
+    // when clustering is off. With clustering on, clusterLayer shows the
+    // clusters and points of the current view, computed in a Web Worker.
+    const individualMarkers = L.featureGroup();
+    const clusterLayer = L.featureGroup();
+    const clusterWorker = new Worker(document.getElementById('map').dataset.clusterWorker);
+    let clusterGeneration = 0;
+    let clusterIndexScheduled = false;
+
+    // Markers are drawn on a shared canvas by default; SVG draws one element each
+    const canvasRenderer = L.canvas({padding: 0.5});
+    const svgRenderer = L.svg();
+    let canvasEnabled = true;
+
+    // Track clustering state and filters
+    let clusteringEnabled = true;
+    let currentFamily = null;
+    let currentDenomination = null;
+
+    // With byLocation, markers are places with the number of religious
+    // bodies there instead of one marker per religious body
+    let byLocation = false;
+
+    // Store families and denominations data
+    let allFamilies = [];
+    let allDenominations = [];
+
+    // Add the initial layer to the map (clustered by default)
+    map.addLayer(clusterLayer);
+
+    // Markers on the map, keyed by religious body id, so loads only add and
+    // remove the difference
+    const markersById = new Map();
+
+    // Abort the requests of a superseded load
+    let loadController = null;
+
+    // Filters of the current load, the areas already fetched for them, and
+    // whether every marker matching them is loaded
+    let currentFilters = {};
+    let loadedAreas = [];
+    let loadedAll = false;
+
+    // Viewport areas being fetched for the current filters, each with the
+    // controller that aborts its requests
+    let pendingAreas = [];
+
+    // Signal of a load of every matching marker that is still in flight
+    let fullLoadSignal = null;
+
+    // Markers are fetched per viewport above this zoom level
+    const DETAIL_ZOOM = 8;
+
+    // Wait this long after the map stops moving before loading
+    const VIEWPORT_DEBOUNCE_MS = 250;
+    let viewportTimer = null;
+
+    // Filters of the most recent load, shared with the statistics panel
+    let currentQuery = new URLSearchParams();
+
+    // Prebuilt marker files for the unfiltered and single-family views, if built
+    const bootstrap = JSON.parse(document.getElementById('map-bootstrap').textContent);
+    const markerSnapshots = bootstrap.marker_snapshots;
+
+    // Statistics for the initial view, used once instead of fetching them
+    let initialStats = bootstrap.initial.stats;
+
+    // The whole dataset in typed arrays, once loaded. Filters and statistics
+    // are then computed in the browser; without a snapshot to load from, it
+    // stays null and markers are fetched from the server.
+    let dataset = null;
+    let datasetSettled = false;
+    const datasetReady = loadDataset()
+        .catch(error => {
+            console.error('Error loading the marker dataset:', error);
+            return null;
+        })
+        .then(loaded => {
+            dataset = loaded;
+            datasetSettled = true;
+        });
+
+    // Open the browser database that keeps the dataset between visits
+    function openDatasetStore() {
+        return new Promise((resolve, reject) => {
+            const request = indexedDB.open('relec-map', 1);
+            request.onupgradeneeded = () => request.result.createObjectStore('datasets');
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    function storeRequest(db, mode, action) {
+        return new Promise((resolve, reject) => {
+            const request = action(db.transaction('datasets', mode).objectStore('datasets'));
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    // Convert the dataset file's columns to typed arrays
+    function toDataset(data) {
+        const orNaN = value => value ?? NaN;
+        const orMissing = value => value ?? -1;
+        return {
+            families: data.families,
+            id: Int32Array.from(data.id),
+            lat: Float64Array.from(data.lat, orNaN),
+            lon: Float64Array.from(data.lon, orNaN),
+            family: Int16Array.from(data.family, orMissing),
+            denomination: Int32Array.from(data.denomination, orMissing),
+            members: Float64Array.from(data.members),
+            edifice_value: Float64Array.from(data.edifice_value),
+            edifice_debt: Float64Array.from(data.edifice_debt)
+        };
+    }
+
+    // Load the dataset for the snapshot version from IndexedDB, or download it
+    // once and keep it there, dropping the datasets of older versions
+    async function loadDataset() {
+        if (!markerSnapshots || !markerSnapshots.dataset || !window.indexedDB) {
+            return null;
+        }
+        const version = markerSnapshots.version;
+        const db = await openDatasetStore();
+
+        const stored = await storeRequest(db, 'readonly', store => store.get(version));
+        if (stored) {
+            return stored;
+        }
+
+        const response = await fetch(markerSnapshots.dataset);
+        if (!response.ok) {
+            throw new Error(`HTTP error! Status: ${response.status}`);
+        }
+        const loaded = toDataset(await response.json());
+
+        const versions = await storeRequest(db, 'readonly', store => store.getAllKeys());
+        await Promise.all(versions.map(key => storeRequest(db, 'readwrite', store => store.delete(key))));
+        await storeRequest(db, 'readwrite', store => store.put(loaded, version));
+        return loaded;
+    }
+
+    // Row indexes of the dataset matching the family and denomination filters
+    function datasetRows(filters) {
+        const familyCode = filters.family_census ? dataset.families.indexOf(filters.family_census) : null;
+        const denomination = filters.denomination ? Number(filters.denomination) : null;
+        const rows = [];
+        if (familyCode === -1) {
+            return rows;
+        }
+        for (let i = 0; i < dataset.id.length; i++) {
+            if (familyCode !== null && dataset.family[i] !== familyCode) {
+                continue;
+            }
+            if (denomination !== null && dataset.denomination[i] !== denomination) {
+                continue;
+            }
+            rows.push(i);
+        }
+        return rows;
+    }
+
+    // Statistics for some dataset rows, in the shape of the stats endpoint
+    function datasetStats(rows) {
+        const fields = ['count', 'members', 'edifice_value', 'edifice_debt'];
+        const zero = () => Object.fromEntries(fields.map(field => [field, 0]));
+        const names = new Map(bootstrap.denominations.map(d => [d.id, d.name]));
+        const total = zero();
+        const families = new Map();
+
+        rows.forEach(i => {
+            const familyName = dataset.families[dataset.family[i]] ?? 'Unknown';
+            if (!families.has(familyName)) {
+                families.set(familyName, {name: familyName, ...zero(), denominations: new Map()});
+            }
+            const family = families.get(familyName);
+
+            const id = dataset.denomination[i] === -1 ? null : dataset.denomination[i];
+            if (!family.denominations.has(id)) {
+                family.denominations.set(id, {id, name: names.get(id) || 'Unknown', ...zero()});
+            }
+            const denomination = family.denominations.get(id);
+
+            const values = {
+                count: 1,
+                members: dataset.members[i],
+                edifice_value: dataset.edifice_value[i],
+                edifice_debt: dataset.edifice_debt[i]
+            };
+            fields.forEach(field => {
+                total[field] += values[field];
+                family[field] += values[field];
+                denomination[field] += values[field];
+            });
+        });
+
+        const byName = (a, b) => (a.name < b.name ? -1 : a.name > b.name ? 1 : 0);
+        return {
+            total,
+            families: [...families.values()].sort(byName).map(family => ({
+                ...family,
+                denominations: [...family.denominations.values()].sort(byName)
+            }))
+        };
+    }
+
+    // Show the dataset rows matching the filters, changing only the difference
+    function showDatasetMarkers() {
+        const rows = datasetRows(currentFilters);
+        const page = {
+            families: dataset.families,
+            results: rows.map(i => ({
+                id: dataset.id[i],
+                lat: dataset.lat[i],
+                lon: dataset.lon[i],
+                family: dataset.family[i] === -1 ? null : dataset.family[i]
+            }))
+        };
+        const seen = new Set();
+        addChurches(page, seen);
+        removeChurches(seen);
+        finishLoad();
+    }
+
+    // Create a legend control
+    const legend = L.control({position: 'bottomright'});
+
+    // Function to update the legend
+    function updateLegend(families) {
+        if (legend.getContainer()) {
+            legend.remove();
+        }
+
+        legend.onAdd = function() {
+            const div = L.DomUtil.create('div', 'info legend');
+
+            if (families.length === 0) {
+                div.innerHTML = '<h6>No denomination families found</h6>';
+                return div;
+            }
+
+            div.innerHTML = '<h6>Denomination Families</h6>';
+
+            // Add legend items
+            families.forEach(family => {
+                div.innerHTML +=
+                    `<div class="mb-1">
+                <i style="background:${getFamilyColor(family)}"></i>
+                ${family}
+            </div>`;
+            });
+
+            return div;
+        };
+
+        legend.addTo(map);
+    }
+
+    // Function to get color based on denomination family
+    function getFamilyColor(family) {
+        // Simple hash function to generate colors
+        let hash = 0;
+        for (let i = 0; i < family.length; i++) {
+            hash = family.charCodeAt(i) + ((hash << 5) - hash);
+        }
+
+        // Convert hash to RGB color
+        const r = (hash & 0xFF) % 200 + 20;
+        const g = ((hash >> 8) & 0xFF) % 200 + 20;
+        const b = ((hash >> 16) & 0xFF) % 200 + 20;
+
+        return `rgb(${r}, ${g}, ${b})`;
+    }
+
+    // Function to toggle clustering. The cluster index is kept current in
+    // the worker, so this only swaps the layer on the map.
+    function toggleClustering() {
+        clusteringEnabled = document.getElementById('clusteringToggle').checked;
+
+        if (clusteringEnabled) {
+            map.removeLayer(individualMarkers);
+            map.addLayer(clusterLayer);
+            requestClusters();
+        } else {
+            map.removeLayer(clusterLayer);
+            clusterLayer.clearLayers();
+            map.addLayer(individualMarkers);
+        }
+
+        // Update marker count display
+        updateMapStatus();
+    }
+
+    // Send the loaded markers' coordinates to the worker to be indexed,
+    // once per frame however many pages arrived in it
+    function scheduleClusterIndex() {
+        if (clusterIndexScheduled) {
+            return;
+        }
+        clusterIndexScheduled = true;
+        requestAnimationFrame(() => {
+            clusterIndexScheduled = false;
+            const ids = new Int32Array(markersById.size);
+            const lat = new Float64Array(markersById.size);
+            const lon = new Float64Array(markersById.size);
+            const weights = new Int32Array(markersById.size);
+            let i = 0;
+            markersById.forEach((marker, id) => {
+                const latLng = marker.getLatLng();
+                ids[i] = id;
+                lat[i] = latLng.lat;
+                lon[i] = latLng.lng;
+                // Places count as the number of religious bodies there
+                weights[i] = marker.churchData.count || 1;
+                i++;
+            });
+            clusterGeneration++;
+            clusterWorker.postMessage(
+                {type: 'index', generation: clusterGeneration, ids, lat, lon, weights},
+                [ids.buffer, lat.buffer, lon.buffer, weights.buffer]
+            );
+        });
+    }
+
+    // Ask the worker for the clusters in and around the current view
+    function requestClusters() {
+        if (!clusteringEnabled) {
+            return;
+        }
+        const bounds = map.getBounds().pad(0.25);
+        clusterWorker.postMessage({
+            type: 'query',
+            bbox: [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()],
+            zoom: map.getZoom()
+        });
+    }
+
+    // Marker for a cluster, styled like Leaflet.markercluster's
+    function createClusterMarker(cluster) {
+        const size = cluster.count < 10 ? 'small' : cluster.count < 100 ? 'medium' : 'large';
+        const marker = L.marker([cluster.lat, cluster.lon], {
+            icon: L.divIcon({
+                html: `<div><span>${cluster.count}</span></div>`,
+                className: `marker-cluster marker-cluster-${size}`,
+                iconSize: L.point(40, 40)
+            })
+        });
+        marker.expansionZoom = cluster.expansion_zoom;
+        return marker;
+    }
+
+    // Show the clusters and single markers returned by the worker
+    function renderClusters(clusters) {
+        clusterLayer.clearLayers();
+        clusters.forEach(cluster => {
+            if (cluster.id === null) {
+                clusterLayer.addLayer(createClusterMarker(cluster));
+                return;
+            }
+            const marker = markersById.get(cluster.id);
+            if (marker) {
+                clusterLayer.addLayer(marker);
+            }
+        });
+    }
+
+    clusterWorker.onmessage = function(event) {
+        const message = event.data;
+        // Answers for an index that has since been replaced are dropped
+        if (message.generation !== clusterGeneration) {
+            return;
+        }
+        if (message.type === 'indexed') {
+            requestClusters();
+        } else if (message.type === 'clusters' && clusteringEnabled) {
+            renderClusters(message.clusters);
+        }
+    };
+
+    // Zoom in on a cluster when it is clicked
+    clusterLayer.on('click', event => {
+        if (event.layer.expansionZoom !== undefined) {
+            map.setView(event.layer.getLatLng(), event.layer.expansionZoom);
+        }
+    });
+
+    // Function to switch between canvas and SVG rendering
+    function toggleRenderer() {
+        canvasEnabled = document.getElementById('canvasToggle').checked;
+
+        // A marker's renderer is fixed when it is created, so recreate them
+        const rebuilt = [];
+        markersById.forEach((marker, id) => {
+            const replacement = createMarker(marker.churchData, marker.family);
+            markersById.set(id, replacement);
+            rebuilt.push(replacement);
+        });
+
+        individualMarkers.clearLayers();
+        addMarkers(rebuilt);
+        requestClusters();
+    }
+
+    // Function to update map status display
+    function updateMapStatus() {
+        const mapStatusElement = document.getElementById('mapStatus');
+        const markerCountElement = document.getElementById('markerCount');
+
+        let bodies = markersById.size;
+        if (byLocation) {
+            bodies = 0;
+            markersById.forEach(marker => {
+                bodies += marker.churchData.count;
+            });
+        }
+        markerCountElement.textContent = `${bodies} religious bodies`;
+
+        let status = `Showing ${markersById.size} locations`;
+        if (currentFamily) {
+            status += ` in ${currentFamily}`;
+            if (currentDenomination) {
+                status += ` > ${currentDenomination}`;
+            }
+        }
+
+        mapStatusElement.textContent = status;
+    }
+
+    // Popup HTML by religious body id, filled when a popup is first opened
+    const popupContent = new Map();
+
+    // Open the popup for a clicked marker, loading its details from the
+    // summary endpoint. Popups are only created for markers that are clicked.
+    function openPopup(event) {
+        const marker = event.layer;
+
+        // Places carry their totals, so their popups need no request
+        if (byLocation) {
+            const place = marker.churchData;
+            const families = place.families
+                .map(([code, count]) => `<li>${bootstrap.families[code]?.name ?? 'Unknown'}: ${count}</li>`)
+                .join('');
+            L.popup()
+                .setLatLng(marker.getLatLng())
+                .setContent(`
+                    <h5 class="font-bold text-lg">${place.count} religious ${place.count === 1 ? 'body' : 'bodies'}</h5>
+                    <p><strong>Members:</strong> ${place.members.toLocaleString()}</p>
+                    <ul>${families}</ul>
+                `)
+                .openOn(map);
+            return;
+        }
+
+        const id = marker.churchData.id;
+        const popup = L.popup()
+            .setLatLng(marker.getLatLng())
+            .setContent(popupContent.get(id) || '<p class="text-gray-500">Loading...</p>')
+            .openOn(map);
+
+        if (popupContent.has(id)) {
+            return;
+        }
+
+        fetch(`/census/api/religious-bodies/${id}/summary/`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! Status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(church => {
+                const content = `
+            <h5 class="font-bold text-lg">${church.name || 'Unnamed Religious Body'}</h5>
+            ${church.place ? `<p>${church.place}</p>` : ''}
+            <p><strong>Denomination:</strong> ${church.denomination_name || 'Unknown'}</p>
+            <p><strong>Family:</strong> ${church.family || 'Unknown'}</p>
+            <p><strong>Members:</strong> ${church.total_members || 0}</p>
+        `;
+                popupContent.set(id, content);
+                popup.setContent(content);
+            })
+            .catch(error => {
+                console.error('Error loading religious body details:', error);
+                popup.setContent('<p>Error loading details.</p>');
+            });
+    }
+
+    // Every marker is in individualMarkers, so its clicks reach this handler
+    // whichever layer is on the map
+    individualMarkers.on('click', openPopup);
+
+    // Function to render the statistics panel
+    function renderFamilyStats(stats) {
+        const total = stats.total;
+        let statsHTML = `
+            <ul class="text-sm space-y-1 mb-3">
+                <li>Members: <span class="font-medium">${total.members.toLocaleString()}</span></li>
+                <li>Value of edifices: <span class="font-medium">$${total.edifice_value.toLocaleString()}</span></li>
+                <li>Debt on edifices: <span class="font-medium">$${total.edifice_debt.toLocaleString()}</span></li>
+            </ul>
+        `;
+
+        stats.families.forEach(family => {
+            statsHTML += `<h4 class="font-medium text-gray-700 mb-2">${family.name}: ${family.count}</h4>`;
+
+            // Add denomination breakdown if we have more than one denomination
+            if (family.denominations.length > 1) {
+                statsHTML += '<ul class="text-sm space-y-1 mb-2">';
+                family.denominations.forEach(denomination => {
+                    statsHTML += `<li>${denomination.name}: <span class="font-medium">${denomination.count}</span></li>`;
+                });
+                statsHTML += '</ul>';
+            }
+        });
+
+        document.getElementById('familyStats').innerHTML = statsHTML;
+    }
+
+    // Function to update family statistics from the loaded dataset or the
+    // server-side aggregates
+    function updateFamilyStats() {
+        if (dataset) {
+            renderFamilyStats(datasetStats(datasetRows(currentFilters)));
+            return;
+        }
+
+        // The first load uses the statistics embedded in the page
+        if (initialStats) {
+            const stats = initialStats;
+            initialStats = null;
+            const initialQuery = new URLSearchParams();
+            if (bootstrap.initial.family_census) {
+                initialQuery.append('family_census', bootstrap.initial.family_census);
+            }
+            if (currentQuery.toString() === initialQuery.toString()) {
+                renderFamilyStats(stats);
+                return;
+            }
+        }
+
+        fetch(`/census/api/religious-bodies/stats/?${currentQuery.toString()}`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! Status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(renderFamilyStats)
+            .catch(error => {
+                console.error('Error loading statistics:', error);
+                document.getElementById('familyStats').innerHTML = '';
+            });
+    }
+
+    // Show the loading indicator, or update its message if it is shown
+    function showLoading(message) {
+        let loadingDiv = document.getElementById('map-loading');
+        if (!loadingDiv) {
+            loadingDiv = document.createElement('div');
+            loadingDiv.id = 'map-loading';
+            loadingDiv.style.position = 'absolute';
+            loadingDiv.style.top = '50%';
+            loadingDiv.style.left = '50%';
+            loadingDiv.style.transform = 'translate(-50%, -50%)';
+            loadingDiv.style.background = 'white';
+            loadingDiv.style.padding = '10px';
+            loadingDiv.style.borderRadius = '5px';
+            loadingDiv.style.boxShadow = '0 0 10px rgba(0,0,0,0.2)';
+            loadingDiv.style.zIndex = '1000';
+            document.getElementById('map').appendChild(loadingDiv);
+        }
+        loadingDiv.innerHTML = message;
+    }
+
+    function hideLoading() {
+        const loadingElem = document.getElementById('map-loading');
+        if (loadingElem) {
+            loadingElem.remove();
+        }
+    }
+
+    // Query parameters for the family and denomination filters
+    function filterParams(filters) {
+        const queryParams = new URLSearchParams();
+        if (filters.family_census) {
+            queryParams.append('family_census', filters.family_census);
+        }
+        if (filters.denomination) {
+            queryParams.append('denomination', filters.denomination);
+        }
+        return queryParams;
+    }
+
+    function boundsParam(bounds) {
+        return `${bounds.getSouth()},${bounds.getWest()},${bounds.getNorth()},${bounds.getEast()}`;
+    }
+
+    // Split the part of an area outside an already loaded area into rectangles
+    function subtractBounds(area, loaded) {
+        if (!area.intersects(loaded)) {
+            return [area];
+        }
+        const south = area.getSouth();
+        const west = area.getWest();
+        const north = area.getNorth();
+        const east = area.getEast();
+        const innerSouth = Math.max(south, loaded.getSouth());
+        const innerNorth = Math.min(north, loaded.getNorth());
+        const innerWest = Math.max(west, loaded.getWest());
+        const innerEast = Math.min(east, loaded.getEast());
+
+        const pieces = [];
+        if (north > innerNorth) {
+            pieces.push(L.latLngBounds([innerNorth, west], [north, east]));
+        }
+        if (south < innerSouth) {
+            pieces.push(L.latLngBounds([south, west], [innerSouth, east]));
+        }
+        if (west < innerWest) {
+            pieces.push(L.latLngBounds([innerSouth, west], [innerNorth, innerWest]));
+        }
+        if (east > innerEast) {
+            pieces.push(L.latLngBounds([innerSouth, innerEast], [innerNorth, east]));
+        }
+        return pieces;
+    }
+
+    // Create the marker for a religious body with the current renderer
+    function createMarker(church, family) {
+        const marker = L.circleMarker(
+            [church.lat, church.lon],
+            {
+                renderer: canvasEnabled ? canvasRenderer : svgRenderer,
+                // Places grow with the number of religious bodies there
+                radius: church.count ? Math.min(3 + Math.sqrt(church.count - 1), 12) : 3,
+                fillColor: getFamilyColor(family),
+                color: '#000',
+                weight: 1,
+                opacity: 1,
+                fillOpacity: 0.8
+            }
+        );
+
+        // Store marker data for filtering and popups
+        marker.churchData = church;
+        marker.family = family;
+        return marker;
+    }
+
+    // Add markers to individualMarkers in one batch. A group on the map
+    // draws each layer as it is added, so while it is shown it is taken off
+    // the map, filled and put back to draw the batch in one pass.
+    function addMarkers(markers) {
+        if (markers.length === 0) {
+            return;
+        }
+        const shown = map.hasLayer(individualMarkers);
+        if (shown) {
+            map.removeLayer(individualMarkers);
+        }
+        markers.forEach(marker => individualMarkers.addLayer(marker));
+        if (shown) {
+            map.addLayer(individualMarkers);
+        }
+    }
+
+    // Add one page of religious bodies to the map, skipping those already shown
+    function addChurches(page, seen) {
+        const added = [];
+        page.results.forEach(church => {
+            if (seen) {
+                seen.add(church.id);
+            }
+            if (!church.lat || !church.lon || markersById.has(church.id)) {
+                return;
+            }
+
+            // Markers carry a family code indexing the page's family list
+            const family = page.families[church.family] ?? 'Unknown';
+            const marker = createMarker(church, family);
+            markersById.set(church.id, marker);
+            added.push(marker);
+        });
+        addMarkers(added);
+
+        // The worker reindexes once for all the pages loaded in a frame
+        scheduleClusterIndex();
+    }
+
+    // Remove the markers whose ids are not in keepIds
+    function removeChurches(keepIds) {
+        const removed = [];
+        markersById.forEach((marker, id) => {
+            if (!keepIds.has(id)) {
+                removed.push(marker);
+                markersById.delete(id);
+            }
+        });
+        removed.forEach(marker => {
+            clusterLayer.removeLayer(marker);
+            individualMarkers.removeLayer(marker);
+        });
+        scheduleClusterIndex();
+    }
+
+    // Fetch markers page by page, following the cursor until the last page
+    function fetchMarkers(queryParams, firstPageUrl, signal, onPage) {
+        function fetchPage(cursor) {
+            const pageParams = new URLSearchParams(queryParams);
+            if (byLocation) {
+                pageParams.set('mode', 'by_location');
+            }
+            if (cursor) {
+                pageParams.set('cursor', cursor);
+            }
+            const url = cursor || !firstPageUrl
+                ? `/census/api/religious-bodies/map_data/?${pageParams.toString()}`
+                : firstPageUrl;
+
+            return fetch(url, {signal})
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`HTTP error! Status: ${response.status}`);
+                    }
+                    return response.json();
+                })
+                .then(page => {
+                    onPage(page);
+                    if (page.next_cursor) {
+                        return fetchPage(page.next_cursor);
+                    }
+                });
+        }
+
+        return fetchPage(null);
+    }
+
+    // Refresh the legend, status and statistics once a load completes
+    function finishLoad() {
+        const families = new Set();
+        markersById.forEach(marker => families.add(marker.family));
+        updateLegend([...families].sort());
+        updateMapStatus();
+        updateFamilyStats();
+    }
+
+    function handleLoadError(error) {
+        // Superseded loads are aborted on purpose
+        if (error.name === 'AbortError') {
+            return;
+        }
+        console.error('Error loading religious body data:', error);
+        showLoading('Error loading data. Please try again.');
+        setTimeout(hideLoading, 3000);
+    }
+
+    // Function to load marker data for new filters. Markers matching both the
+    // old and new filters stay on the map; only the difference is changed.
+    function loadMarkers(filters = {}) {
+        // Wait to see whether the dataset can be used
+        if (!datasetSettled) {
+            showLoading('Loading data...');
+            datasetReady.then(() => loadMarkers(filters));
+            return;
+        }
+
+        currentFamily = filters.family_census || null;
+        if (!filters.denomination) {
+            currentDenomination = null;
+        }
+        currentFilters = {
+            family_census: filters.family_census,
+            denomination: filters.denomination
+        };
+        loadedAreas = [];
+        loadedAll = false;
+
+        // Abort requests for the previous filters
+        if (loadController) {
+            loadController.abort();
+        }
+        pendingAreas.forEach(pending => pending.controller.abort());
+        pendingAreas = [];
+
+        // With the dataset loaded, filtering religious bodies needs no requests
+        if (dataset && !byLocation) {
+            loadedAll = true;
+            currentQuery = filterParams(currentFilters);
+            showDatasetMarkers();
+            hideLoading();
+            return;
+        }
+
+        loadController = new AbortController();
+        const signal = loadController.signal;
+
+        // Zoomed in, only the visible area is fetched
+        const queryParams = filterParams(currentFilters);
+        const area = map.getZoom() > DETAIL_ZOOM ? map.getBounds() : null;
+        if (area) {
+            queryParams.set('bounds', boundsParam(area));
+        }
+        fullLoadSignal = area ? null : signal;
+
+        // Remember the filters so the statistics panel can match them
+        currentQuery = new URLSearchParams(queryParams);
+
+        // Unfiltered and single-family views are served from the static snapshot
+        let firstPageUrl = null;
+        if (markerSnapshots && !area && !currentFilters.denomination && !byLocation) {
+            firstPageUrl = markerSnapshots.files[currentFilters.family_census || 'all'] || null;
+        }
+
+        showLoading('Loading data...');
+        const timeoutId = setTimeout(() => {
+            if (document.getElementById('map-loading')) {
+                showLoading('Loading is taking longer than expected. Please wait...');
+            }
+        }, 3000);
+
+        const seen = new Set();
+        fetchMarkers(queryParams, firstPageUrl, signal, page => {
+            addChurches(page, seen);
+            updateMapStatus();
+        })
+            .then(() => {
+                clearTimeout(timeoutId);
+
+                // Drop the markers that do not match the new filters
+                removeChurches(seen);
+                if (area) {
+                    loadedAreas.push(area);
+                } else {
+                    loadedAll = true;
+                    fullLoadSignal = null;
+                }
+
+                hideLoading();
+                finishLoad();
+            })
+            .catch(error => {
+                clearTimeout(timeoutId);
+                if (fullLoadSignal === signal) {
+                    fullLoadSignal = null;
+                }
+                handleLoadError(error);
+            });
+    }
+
+    // Function to load the markers in the newly exposed part of the viewport
+    function loadViewport() {
+        if (loadedAll) {
+            return;
+        }
+
+        // Filters applied while zoomed in only fetched the areas viewed so
+        // far; zoomed out, every marker matching them is needed
+        if (map.getZoom() <= DETAIL_ZOOM) {
+            if (!fullLoadSignal) {
+                loadMarkers({...currentFilters});
+            }
+            return;
+        }
+
+        const view = map.getBounds();
+
+        // Requests for areas that have left the view are no longer needed
+        pendingAreas = pendingAreas.filter(pending => {
+            if (pending.area.intersects(view)) {
+                return true;
+            }
+            pending.controller.abort();
+            return false;
+        });
+
+        // Areas loaded or still loading are not requested again
+        const covered = loadedAreas.concat(pendingAreas.map(pending => pending.area));
+        const exposed = covered.reduce(
+            (pieces, loaded) => pieces.flatMap(piece => subtractBounds(piece, loaded)),
+            [view]
+        );
+
+        // Statistics follow the visible area
+        currentQuery = filterParams(currentFilters);
+        currentQuery.set('bounds', boundsParam(view));
+
+        if (exposed.length === 0) {
+            updateFamilyStats();
+            return;
+        }
+
+        Promise.all(exposed.map(area => {
+            const pending = {area, controller: new AbortController()};
+            pendingAreas.push(pending);
+            const queryParams = filterParams(currentFilters);
+            queryParams.set('bounds', boundsParam(area));
+            return fetchMarkers(queryParams, null, pending.controller.signal, page => addChurches(page))
+                .then(() => {
+                    if (!pending.controller.signal.aborted) {
+                        loadedAreas.push(area);
+                    }
+                })
+                .catch(handleLoadError)
+                .finally(() => {
+                    pendingAreas = pendingAreas.filter(other => other !== pending);
+                });
+        }))
+            .then(finishLoad);
+    }
+
+    // Function to show the families embedded in the page
+    function loadFamilies() {
+        const familyList = document.getElementById('familyList');
+        allFamilies = bootstrap.families;
+
+        // Check if we have families data
+        if (allFamilies.length === 0) {
+            familyList.innerHTML = '<div class="text-gray-500 text-sm text-center py-4">No families found</div>';
+            return;
+        }
+
+        // Create HTML for family list
+        let familyHTML = '';
+        allFamilies.forEach(family => {
+            familyHTML += `
+            <div class="family-card" data-family="${family.name}">
+                <div class="font-medium">${family.name}</div>
+                <div class="text-sm text-gray-500">
+                    ${family.count} denomination${family.count !== 1 ? 's' : ''}
+                </div>
+            </div>
+        `;
+        });
+
+        familyList.innerHTML = familyHTML;
+
+        // Add click event listeners to family cards
+        document.querySelectorAll('.family-card').forEach(card => {
+            card.addEventListener('click', () => {
+                const familyName = card.dataset.family;
+
+                // Update UI
+                document.querySelectorAll('.family-card').forEach(c => {
+                    c.classList.remove('active');
+                });
+                card.classList.add('active');
+
+                // Load denominations for this family
+                loadDenominations(familyName);
+
+                // Apply filter to map
+                loadMarkers({family_census: familyName});
+            });
+        });
+
+        // Select the initial family chosen by the server, if any
+        const initialFamily = bootstrap.initial.family_census;
+        if (initialFamily) {
+            const initialCard = [...document.querySelectorAll('.family-card')]
+                .find(card => card.dataset.family === initialFamily);
+            if (initialCard) {
+                initialCard.click();
+            }
+        }
+    }
+
+    // Function to show the denominations of a family from the embedded catalog
+    function loadDenominations(familyName) {
+        const denominationList = document.getElementById('denominationList');
+        allDenominations = bootstrap.denominations.filter(
+            denomination => denomination.family_census === familyName
+        );
+
+        if (allDenominations.length === 0) {
+            denominationList.innerHTML = '<div class="text-gray-500 text-sm text-center py-4">No denominations found</div>';
+            return;
+        }
+
+        let denominationHTML = '';
+        allDenominations.forEach(denomination => {
+            denominationHTML += `
+            <div class="denomination-item" data-id="${denomination.id}" data-name="${denomination.name}">
+                ${denomination.name}
+            </div>
+        `;
+        });
+
+        denominationList.innerHTML = denominationHTML;
+
+        // Add click handlers for denomination items
+        document.querySelectorAll('.denomination-item').forEach(item => {
+            item.addEventListener('click', () => {
+                const denominationId = item.dataset.id;
+                const denominationName = item.dataset.name;
+
+                // Toggle active state
+                if (item.classList.contains('active')) {
+                    // If already selected, deselect it
+                    item.classList.remove('active');
+                    loadMarkers({family_census: currentFamily});
+                    currentDenomination = null;
+                } else {
+                    // Select this denomination
+                    document.querySelectorAll('.denomination-item').forEach(i => {
+                        i.classList.remove('active');
+                    });
+                    item.classList.add('active');
+                    loadMarkers({
+                        family_census: currentFamily,
+                        denomination: denominationId
+                    });
+                    currentDenomination = denominationName;
+                }
+            });
+        });
+    }
+
+    // Function to filter denominations by search term
+    function filterDenominations(searchTerm) {
+        searchTerm = searchTerm.toLowerCase();
+
+        document.querySelectorAll('.denomination-item').forEach(item => {
+            const denominationName = item.dataset.name.toLowerCase();
+            if (denominationName.includes(searchTerm)) {
+                item.style.display = 'block';
+            } else {
+                item.style.display = 'none';
+            }
+        });
+    }
+
+    // Set up event listeners
+
+    // Clustering toggle
+    document.getElementById('clusteringToggle').addEventListener('change', toggleClustering);
+
+    // Renderer toggle
+    document.getElementById('canvasToggle').addEventListener('change', toggleRenderer);
+
+    // Switch between one marker per religious body and one per place. The
+    // two kinds of marker have different ids, so the map is cleared first.
+    document.getElementById('byLocationToggle').addEventListener('change', (e) => {
+        byLocation = e.target.checked;
+        removeChurches(new Set());
+        loadMarkers({...currentFilters});
+    });
+
+    // Clear filters
+    document.getElementById('clearFamilyFilter').addEventListener('click', () => {
+        // Clear family selection
+        document.querySelectorAll('.family-card').forEach(card => {
+            card.classList.remove('active');
+        });
+
+        // Clear denomination selection and list
+        document.getElementById('denominationList').innerHTML = '<div class="text-gray-500 text-sm text-center py-4">Select a family first</div>';
+
+        // Clear filters on map
+        currentFamily = null;
+        currentDenomination = null;
+        loadMarkers({});
+    });
+
+    document.getElementById('clearDenominationFilter').addEventListener('click', () => {
+        // Clear denomination selection
+        document.querySelectorAll('.denomination-item').forEach(item => {
+            item.classList.remove('active');
+        });
+
+        // Keep family filter, remove denomination filter
+        currentDenomination = null;
+        loadMarkers({family_census: currentFamily});
+    });
+
+    // Denomination search
+    document.getElementById('denominationSearch').addEventListener('input', (e) => {
+        filterDenominations(e.target.value);
+    });
+
+    // Track map movement to load data for the newly visible area only
+    map.on('moveend', function() {
+        requestClusters();
+        clearTimeout(viewportTimer);
+        viewportTimer = setTimeout(loadViewport, VIEWPORT_DEBOUNCE_MS);
+    });
+
+    // Initial data load
+    loadFamilies();
+});
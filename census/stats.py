@@ -0,0 +1,161 @@
+import hashlib
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from religious_ecologies.middleware import timing
+
+from .models import CensusRollup, Membership
+
+# Seconds that aggregate statistics stay cached
+STATS_CACHE_TIMEOUT = 60 * 15
+
+# Cache key of the version that cached statistics are stored under. Bumping
+# it makes every cached result stale at once, but only for processes that
+# share the cache: with the default per-process LocMemCache, other workers
+# serve their cached statistics until STATS_CACHE_TIMEOUT runs out.
+STATS_VERSION_KEY = "census:stats:version"
+
+# Stats filters that can be answered from CensusRollup, and the rollup
+# lookup each one maps to
+ROLLUP_STATS_FILTERS = {
+    "family_census": "family_census",
+    "denomination": "denomination_id",
+}
+
+TOTALS_FIELDS = ["count", "members", "edifice_value", "edifice_debt"]
+
+
+def rollup_stats_rows(params):
+    """
+    Read the per-denomination totals from the rollup tables, or return
+    None if a filter needs the fact tables (bounds, search).
+    """
+    queryset = CensusRollup.objects.all()
+    for key, values in params:
+        if key not in ROLLUP_STATS_FILTERS:
+            return None
+        try:
+            for value in values:
+                queryset = queryset.filter(**{ROLLUP_STATS_FILTERS[key]: value})
+        except ValueError:
+            return None
+    return (
+        queryset.order_by()
+        .values("denomination_id", "denomination__name", "family_census")
+        .annotate(
+            count=Sum("religious_body_count"),
+            members=Sum("members"),
+            edifice_value=Sum("edifice_value"),
+            edifice_debt=Sum("edifice_debt"),
+        )
+    )
+
+
+def _body_members():
+    """Member total of each religious body over all of its memberships."""
+    members = Coalesce(
+        "total_members_by_sex",
+        Coalesce("male_members", 0) + Coalesce("female_members", 0),
+    )
+    return Subquery(
+        Membership.objects.filter(religious_body=OuterRef("pk"))
+        .order_by()
+        .values("religious_body")
+        .annotate(total=Sum(members))
+        .values("total"),
+        output_field=IntegerField(),
+    )
+
+
+def fact_stats_rows(queryset):
+    """
+    Per-denomination totals of a filtered ReligiousBody queryset. Member
+    counts are summed per body in a subquery, so a body with several
+    memberships still adds its edifice value and debt once.
+    """
+    return (
+        queryset.order_by()
+        .annotate(body_members=_body_members())
+        .values(
+            "denomination_id",
+            "denomination__name",
+            family_census=F("denomination__family_census"),
+        )
+        .annotate(
+            count=Count("id"),
+            members=Coalesce(Sum("body_members"), 0),
+            edifice_value=Coalesce(Sum("edifice_value"), Decimal(0)),
+            edifice_debt=Coalesce(Sum("edifice_debt"), Decimal(0)),
+        )
+    )
+
+
+def summarise_stats(rows):
+    """Group per-denomination rows into totals per family and overall."""
+    total = dict.fromkeys(TOTALS_FIELDS, 0)
+    families = {}
+    for row in rows:
+        # Money is returned as float, as DRF renders decimals
+        row = {
+            key: float(value) if isinstance(value, Decimal) else value
+            for key, value in row.items()
+        }
+        family_name = row["family_census"] or "Unknown"
+        family = families.setdefault(
+            family_name,
+            {
+                "name": family_name,
+                **dict.fromkeys(TOTALS_FIELDS, 0),
+                "denominations": [],
+            },
+        )
+        family["denominations"].append(
+            {
+                "id": row["denomination_id"],
+                "name": row["denomination__name"] or "Unknown",
+                **{field: row[field] or 0 for field in TOTALS_FIELDS},
+            }
+        )
+        for field in TOTALS_FIELDS:
+            family[field] += row[field] or 0
+            total[field] += row[field] or 0
+
+    for family in families.values():
+        family["denominations"].sort(key=lambda d: d["name"])
+    return {
+        "total": total,
+        "families": [families[name] for name in sorted(families)],
+    }
+
+
+def invalidate():
+    """Drop the cached statistics after the data they are computed from changes."""
+    cache.add(STATS_VERSION_KEY, 0, None)
+    cache.incr(STATS_VERSION_KEY)
+
+
+def get_stats(params, get_queryset, request=None):
+    """
+    Return cached statistics for query parameters given as (key, values)
+    pairs. Rollups answer family and denomination filters; any other filter
+    falls back to get_queryset(), which returns the filtered religious bodies.
+    Building the response is timed as "serialize" for the request.
+    """
+    params = sorted(
+        (key, values) for key, values in params if key not in ("_", "format")
+    )
+    cache_key = "census:stats:" + hashlib.md5(repr(params).encode()).hexdigest()
+    version = cache.get_or_set(STATS_VERSION_KEY, 0, None)
+    data = cache.get(cache_key, version=version)
+    if data is None:
+        rows = rollup_stats_rows(params)
+        if rows is None:
+            rows = fact_stats_rows(get_queryset())
+        rows = list(rows)
+        with timing(request, "serialize"):
+            data = summarise_stats(rows)
+        cache.set(cache_key, data, STATS_CACHE_TIMEOUT, version=version)
+    return data
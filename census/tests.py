@@ -1,3 +1,724 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import brotli
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from religious_ecologies.admin import EstimatedCountPaginator
+from religious_ecologies.testing import create_location, plain_static_storage
+
+from . import catalog, columnar, exports, rollups, snapshots
+from .models import (
+    CensusRollup,
+    CensusSchedule,
+    Clergy,
+    Denomination,
+    Membership,
+    ReligiousBody,
+)
+
+
+def create_religious_body(index, denomination, location):
+    """Create a schedule with a religious body, membership and clergy."""
+    schedule = CensusSchedule.objects.create(
+        resource_id=index,
+        schedule_title=f"Schedule {index}",
+        schedule_id=f"schedule-{index}",
+        datascribe_omeka_item_id=index,
+        datascribe_item_id=index,
+        datascribe_record_id=index,
+        datascribe_original_image_path="",
+        omeka_storage_id="",
+    )
+    religious_body = ReligiousBody.objects.create(
+        census_record=schedule,
+        denomination=denomination,
+        location=location,
+        name=f"Church {index}",
+    )
+    Membership.objects.create(
+        census_record=schedule,
+        religious_body=religious_body,
+        male_members=10,
+        female_members=20,
+    )
+    Clergy.objects.create(census_schedule=schedule, name=f"Pastor {index}")
+    Clergy.objects.create(
+        census_schedule=schedule, name=f"Assistant {index}", is_assistant=True
+    )
+    return religious_body
+
+
+class CensusDataTestCase(TestCase):
+    """Tests with a Methodist denomination and a location in Fairfax, VA."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.denomination = Denomination.objects.create(
+            denomination_id="1", name="Methodist", family_census="Methodist"
+        )
+        cls.location = create_location()
+
+    def setUp(self):
+        # The denomination catalog may hold another test's denominations
+        catalog.invalidate()
+
+
+class ReligiousBodyAPITestCase(CensusDataTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_list_query_count_is_constant(self):
+        # One query for the bodies, one for memberships, one for pastors
+        for count in (1, 5):
+            CensusSchedule.objects.all().delete()
+            for index in range(count):
+                create_religious_body(index, self.denomination, self.location)
+
+            with self.assertNumQueries(3):
+                response = self.client.get("/census/api/religious-bodies/")
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()["results"]), count)
+
+    def test_list_reads_membership_and_pastor(self):
+        create_religious_body(1, self.denomination, self.location)
+
+        response = self.client.get("/census/api/religious-bodies/")
+
+        body = response.json()["results"][0]
+        self.assertEqual(body["total_members"], 30)
+        self.assertEqual(body["membership_details"]["total"], 30)
+        self.assertEqual(body["pastors"]["name"], "Pastor 1")
+
+    def test_list_is_cursor_paginated(self):
+        for index in range(3):
+            create_religious_body(index, self.denomination, self.location)
+
+        response = self.client.get("/census/api/religious-bodies/?page_size=2")
+        first_page = response.json()
+        self.assertEqual(
+            [body["name"] for body in first_page["results"]], ["Church 0", "Church 1"]
+        )
+
+        response = self.client.get(first_page["next"])
+        second_page = response.json()
+        self.assertEqual(
+            [body["name"] for body in second_page["results"]], ["Church 2"]
+        )
+        self.assertIsNone(second_page["next"])
+
+    def test_sparse_fields_skip_joins_and_prefetches(self):
+        create_religious_body(1, self.denomination, self.location)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/census/api/religious-bodies/?fields=name,edifice_value"
+            )
+
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("JOIN", queries[0]["sql"])
+        body = response.json()["results"][0]
+        self.assertEqual(set(body), {"id", "name", "edifice_value"})
+
+    def test_expand_adds_nested_fields(self):
+        create_religious_body(1, self.denomination, self.location)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/census/api/religious-bodies/?fields=name&expand=total_members"
+            )
+
+        self.assertEqual(len(queries), 2)
+        self.assertFalse([query for query in queries if "JOIN" in query["sql"]])
+
+        body = response.json()["results"][0]
+        self.assertEqual(
+            body, {"id": body["id"], "name": "Church 1", "total_members": 30}
+        )
+
+    def test_search_ranks_full_text_and_fuzzy_matches(self):
+        create_religious_body(1, self.denomination, self.location)
+        ReligiousBody.objects.filter(name="Church 1").update(
+            name="Grace Methodist Episcopal"
+        )
+        create_religious_body(2, self.denomination, self.location)
+        ReligiousBody.objects.filter(name="Church 2").update(name="First Baptist")
+
+        for term in ("methodists", "Metho", "Methodst"):
+            response = self.client.get(f"/census/api/religious-bodies/?search={term}")
+            names = [body["name"] for body in response.json()["results"]]
+            self.assertEqual(names, ["Grace Methodist Episcopal"], term)
+
+    def test_search_matches_partial_census_codes(self):
+        create_religious_body(1, self.denomination, self.location)
+        ReligiousBody.objects.filter(name="Church 1").update(census_code="AB-123")
+        create_religious_body(2, self.denomination, self.location)
+        ReligiousBody.objects.filter(name="Church 2").update(census_code="CD-456")
+
+        response = self.client.get("/census/api/religious-bodies/?search=AB-12")
+        names = [body["name"] for body in response.json()["results"]]
+        self.assertEqual(names, ["Church 1"])
+
+    @plain_static_storage
+    def test_browsable_api_shows_the_search_box(self):
+        response = self.client.get(
+            "/census/api/religious-bodies/", HTTP_ACCEPT="text/html"
+        )
+        self.assertContains(response, 'name="search"')
+
+    def test_family_filter_follows_denomination_changes(self):
+        create_religious_body(1, self.denomination, self.location)
+        url = "/census/api/religious-bodies/?family_census={}"
+
+        # Three queries for the page and two to build the denomination catalog
+        with self.assertNumQueries(5):
+            response = self.client.get(url.format("Methodist"))
+        self.assertEqual(len(response.json()["results"]), 1)
+
+        # The family mapping is cached, so repeat requests skip its query
+        with self.assertNumQueries(3):
+            self.client.get(url.format("Methodist"))
+
+        self.denomination.family_census = "Wesleyan"
+        self.denomination.save()
+
+        response = self.client.get(url.format("Methodist"))
+        self.assertEqual(response.json()["results"], [])
+        response = self.client.get(url.format("Wesleyan"))
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_stats_aggregates_by_family_and_denomination(self):
+        cache.clear()
+        create_religious_body(1, self.denomination, self.location)
+        create_religious_body(2, self.denomination, self.location)
+        ReligiousBody.objects.update(edifice_value=1000)
+
+        response = self.client.get("/census/api/religious-bodies/stats/")
+
+        stats = response.json()
+        self.assertEqual(stats["total"]["count"], 2)
+        self.assertEqual(stats["total"]["members"], 60)
+        family = stats["families"][0]
+        self.assertEqual(family["name"], "Methodist")
+        self.assertEqual(family["denominations"][0]["count"], 2)
+
+        # Results are cached per filter set
+        with self.assertNumQueries(0):
+            self.client.get("/census/api/religious-bodies/stats/")
+
+        response = self.client.get("/census/api/religious-bodies/stats/?bounds=0,0,1,1")
+        self.assertEqual(response.json()["total"]["count"], 0)
+
+        # Refreshing the rollups makes the cached results stale
+        with self.captureOnCommitCallbacks(execute=True):
+            create_religious_body(3, self.denomination, self.location)
+        response = self.client.get("/census/api/religious-bodies/stats/")
+        self.assertEqual(response.json()["total"]["count"], 3)
+
+    def test_stats_count_edifice_money_once_per_body(self):
+        cache.clear()
+        body = create_religious_body(1, self.denomination, self.location)
+        Membership.objects.create(
+            census_record=body.census_record, religious_body=body, male_members=5
+        )
+        body.edifice_value = 100
+        body.edifice_debt = 40
+        body.save()
+
+        rollup = self.client.get("/census/api/religious-bodies/stats/").json()
+        # Bounds are answered from the fact tables
+        fact = self.client.get(
+            "/census/api/religious-bodies/stats/?bounds=38,-78,39,-77"
+        ).json()
+
+        for stats in (rollup, fact):
+            self.assertEqual(
+                stats["total"],
+                {"count": 1, "members": 35, "edifice_value": 100, "edifice_debt": 40},
+            )
+
+    def test_export_query_does_not_group_the_rows(self):
+        create_religious_body(1, self.denomination, self.location)
+
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(exports.export_rows(ReligiousBody.objects.order_by("id")))
+
+        self.assertEqual(rows[0]["male_members"], 10)
+        # Only the per-body membership subqueries group
+        self.assertEqual(
+            queries[0]["sql"].count("GROUP BY"), len(rollups.MEMBERSHIP_FIELDS)
+        )
+
+    async def test_export_streams_filtered_rows(self):
+        body = await sync_to_async(create_religious_body)(
+            1, self.denomination, self.location
+        )
+        other = await Denomination.objects.acreate(
+            denomination_id="2", name="Baptist", family_census="Baptist"
+        )
+        await sync_to_async(create_religious_body)(2, other, self.location)
+        # A second membership is summed into the body's row
+        await Membership.objects.acreate(
+            census_record_id=body.census_record_id,
+            religious_body=body,
+            male_members=5,
+        )
+
+        async def read(url):
+            response = await self.async_client.get(url)
+            self.assertTrue(response.streaming)
+            self.assertTrue(response.is_async)
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        content = await read(
+            "/census/api/religious-bodies/export/csv/?family_census=Methodist"
+        )
+        rows = list(csv.DictReader(content.decode().splitlines()))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["name"], "Church 1")
+        self.assertEqual(rows[0]["male_members"], "15")
+        self.assertEqual(rows[0]["female_members"], "20")
+        self.assertEqual(rows[0]["pastor_name"], "Pastor 1")
+        self.assertEqual(rows[0]["assistant_pastor_name"], "Assistant 1")
+
+        content = await read("/census/api/religious-bodies/export/geojson/")
+        collection = json.loads(content)
+        self.assertEqual(len(collection["features"]), 2)
+        self.assertEqual(
+            collection["features"][0]["geometry"]["coordinates"], [-77.3, 38.85]
+        )
+
+    def test_batch_preserves_order_in_one_round_trip(self):
+        bodies = [
+            create_religious_body(index, self.denomination, self.location)
+            for index in range(3)
+        ]
+        ids = [bodies[2].pk, bodies[0].pk, 999999, bodies[1].pk]
+
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                "/census/api/religious-bodies/batch/?ids="
+                + ",".join(str(pk) for pk in ids)
+            )
+        data = response.json()
+        self.assertEqual(
+            [body["name"] for body in data["results"]],
+            ["Church 2", "Church 0", "Church 1"],
+        )
+        self.assertEqual(data["missing"], [999999])
+
+        response = self.client.post(
+            "/census/api/religious-bodies/batch/?fields=name",
+            {"ids": [bodies[1].pk]},
+            format="json",
+        )
+        self.assertEqual(
+            response.json()["results"], [{"id": bodies[1].pk, "name": "Church 1"}]
+        )
+
+        response = self.client.get("/census/api/religious-bodies/batch/?ids=1,x")
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_accepts_list_and_form_bodies(self):
+        bodies = [
+            create_religious_body(index, self.denomination, self.location)
+            for index in range(2)
+        ]
+        url = "/census/api/religious-bodies/batch/?fields=name"
+
+        response = self.client.post(url, [bodies[1].pk, bodies[0].pk], format="json")
+        self.assertEqual(
+            [body["name"] for body in response.json()["results"]],
+            ["Church 1", "Church 0"],
+        )
+
+        # Every repeated form value is kept
+        response = self.client.post(url, {"ids": [bodies[0].pk, bodies[1].pk]})
+        self.assertEqual(
+            [body["name"] for body in response.json()["results"]],
+            ["Church 0", "Church 1"],
+        )
+
+        response = self.client.post(url, "1", format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_map_data_returns_compact_markers(self):
+        body = create_religious_body(1, self.denomination, self.location)
+
+        response = self.client.get("/census/api/religious-bodies/map_data/")
+
+        data = response.json()
+        self.assertEqual(data["families"], ["Methodist"])
+        self.assertEqual(
+            data["results"],
+            [{"id": body.pk, "lat": 38.85, "lon": -77.3, "family": 0}],
+        )
+
+    def test_map_data_cursor_reaches_every_marker_once(self):
+        places = [self.location] + [
+            create_location(index, f"City {index}") for index in (2, 3)
+        ]
+        bodies = [
+            create_religious_body(index, self.denomination, places[index % 3])
+            for index in range(7)
+        ]
+        create_religious_body(7, self.denomination, None)
+
+        for mode, expected in (
+            ("", [body.pk for body in bodies]),
+            ("by_location", [place.pk for place in places]),
+        ):
+            url = f"/census/api/religious-bodies/map_data/?mode={mode}&limit=2"
+            seen = []
+            response = self.client.get(url)
+            while True:
+                data = response.json()
+                seen += [row["id"] for row in data["results"]]
+                if data["next_cursor"] is None:
+                    break
+                response = self.client.get(f"{url}&cursor={data['next_cursor']}")
+            self.assertEqual(seen, expected, mode)
+
+    def test_marker_snapshots_are_served_precompressed(self):
+        # Enough markers for compression to pay off
+        for index in range(20):
+            create_religious_body(index, self.denomination, self.location)
+
+        with (
+            tempfile.TemporaryDirectory() as root,
+            override_settings(MARKER_SNAPSHOT_ROOT=root),
+        ):
+            snapshots.write_marker_snapshots()
+            manifest = snapshots.load_manifest()
+            # Rebuilding unchanged data keeps the version
+            self.assertEqual(
+                snapshots.write_marker_snapshots()["version"], manifest["version"]
+            )
+
+            response = self.client.get(
+                manifest["files"]["Methodist"], HTTP_ACCEPT_ENCODING="gzip"
+            )
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertIn("immutable", response["Cache-Control"])
+            snapshot = json.loads(gzip.decompress(b"".join(response.streaming_content)))
+
+            response = self.client.get(
+                manifest["files"]["Methodist"], HTTP_ACCEPT_ENCODING="br, gzip"
+            )
+            self.assertEqual(response["Content-Encoding"], "br")
+            self.assertEqual(
+                json.loads(brotli.decompress(b"".join(response.streaming_content))),
+                snapshot,
+            )
+
+        response = self.client.get(
+            "/census/api/religious-bodies/map_data/?family_census=Methodist"
+        )
+        self.assertEqual(snapshot, response.json())
+
+    def test_map_data_by_location_aggregates_bodies_per_place(self):
+        create_religious_body(1, self.denomination, self.location)
+        create_religious_body(2, self.denomination, self.location)
+        baptist = Denomination.objects.create(
+            denomination_id="2", name="Baptist", family_census="Baptist"
+        )
+        create_religious_body(3, baptist, self.location)
+
+        # Two queries for the page of places and their totals, and two to
+        # build the denomination catalog
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                "/census/api/religious-bodies/map_data/?mode=by_location"
+            )
+
+        data = response.json()
+        self.assertEqual(data["families"], ["Baptist", "Methodist"])
+        self.assertEqual(
+            data["results"],
+            [
+                {
+                    "id": self.location.pk,
+                    "lat": 38.85,
+                    "lon": -77.3,
+                    "count": 3,
+                    "members": 90,
+                    "family": 1,
+                    "families": [[1, 2], [0, 1]],
+                }
+            ],
+        )
+        self.assertIsNone(data["next_cursor"])
+
+    def test_dataset_snapshot_has_a_column_per_field(self):
+        body = create_religious_body(1, self.denomination, self.location)
+        unlocated = create_religious_body(2, self.denomination, None)
+        ReligiousBody.objects.filter(pk=body.pk).update(edifice_value=1000)
+
+        dataset = json.loads(snapshots.build_dataset_payload(["Methodist"]))
+
+        self.assertEqual(dataset["id"], [body.pk, unlocated.pk])
+        self.assertEqual(dataset["lat"], [38.85, None])
+        self.assertEqual(dataset["family"], [0, 0])
+        self.assertEqual(dataset["denomination"], [self.denomination.pk] * 2)
+        self.assertEqual(dataset["members"], [30, 30])
+        self.assertEqual(dataset["edifice_value"], [1000.0, 0.0])
+
+    def test_analysis_snapshot_has_typed_columns(self):
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+
+        body = create_religious_body(1, self.denomination, self.location)
+        create_religious_body(2, self.denomination, None)
+        ReligiousBody.objects.filter(pk=body.pk).update(edifice_value=1000)
+
+        with (
+            tempfile.TemporaryDirectory() as root,
+            override_settings(MEDIA_ROOT=root),
+        ):
+            names = columnar.write_analysis_snapshot()
+            parquet = pyarrow.parquet.read_table(os.path.join(root, names["parquet"]))
+            with pyarrow.memory_map(os.path.join(root, names["arrow"])) as source:
+                arrow = pyarrow.ipc.open_file(source).read_all()
+
+            response = self.client.get("/census/data/religious-bodies.parquet")
+            with open(os.path.join(root, names["parquet"]), "rb") as f:
+                self.assertEqual(b"".join(response.streaming_content), f.read())
+
+        self.assertTrue(parquet.equals(arrow))
+        self.assertEqual(arrow.num_rows, 2)
+        self.assertEqual(
+            arrow.schema.field("state").type,
+            pyarrow.dictionary(pyarrow.int32(), pyarrow.string()),
+        )
+        self.assertEqual(arrow.schema.field("male_members").type, pyarrow.int32())
+        self.assertEqual(arrow.column("state").to_pylist(), ["VA", None])
+        self.assertEqual(arrow.column("edifice_value").to_pylist(), [1000.0, None])
+        self.assertEqual(arrow.column("male_members").to_pylist(), [10, 10])
+
+    def test_summary_is_revalidated_with_etag(self):
+        body = create_religious_body(1, self.denomination, self.location)
+        url = f"/census/api/religious-bodies/{body.pk}/summary/"
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()["total_members"], 30)
+        self.assertIn("max-age", response["Cache-Control"])
+        etag = response["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Membership.objects.filter(religious_body=body).update(
+            male_members=15, updated_at=timezone.now()
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total_members"], 35)
+
+    def test_summary_sums_several_memberships(self):
+        body = create_religious_body(1, self.denomination, self.location)
+        Membership.objects.create(
+            census_record=body.census_record,
+            religious_body=body,
+            total_members_by_sex=12,
+        )
+
+        response = self.client.get(f"/census/api/religious-bodies/{body.pk}/summary/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total_members"], 42)
+
+
+class DenominationAPITestCase(TestCase):
+    def setUp(self):
+        catalog.invalidate()
+        for index, family in enumerate(["Methodist", "Methodist", "Baptist"]):
+            Denomination.objects.create(
+                denomination_id=str(index),
+                name=f"Denomination {index}",
+                family_census=family,
+                family_relec=family,
+            )
+
+    def test_families_are_served_from_the_catalog(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/census/api/denominations/families/")
+        self.assertEqual(
+            response.json()["census_families"],
+            [{"name": "Baptist", "count": 1}, {"name": "Methodist", "count": 2}],
+        )
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                "/census/api/denominations/by_family/?family_census=Methodist"
+            )
+            self.client.get("/census/api/denominations/")
+        self.assertEqual(
+            [denomination["name"] for denomination in response.json()],
+            ["Denomination 0", "Denomination 1"],
+        )
+
+        Denomination.objects.filter(name="Denomination 1").get().delete()
+        response = self.client.get("/census/api/denominations/families/")
+        self.assertEqual(
+            response.json()["census_families"],
+            [{"name": "Baptist", "count": 1}, {"name": "Methodist", "count": 1}],
+        )
+
+
+class CensusRollupTestCase(CensusDataTestCase):
+    def rollup_values(self):
+        return sorted(
+            CensusRollup.objects.values_list(
+                "state", "county", "family_census", "religious_body_count", "members"
+            ),
+            key=str,
+        )
+
+    def test_signals_match_rebuild(self):
+        first = create_religious_body(1, self.denomination, self.location)
+        create_religious_body(2, self.denomination, self.location)
+        first.location = None
+        first.save()
+        self.location.county = "Arlington"
+        self.location.save()
+        self.denomination.family_census = "Wesleyan"
+        self.denomination.save()
+
+        incremental = self.rollup_values()
+        self.assertEqual(
+            incremental,
+            [("", "", "Wesleyan", 1, 30), ("VA", "Arlington", "Wesleyan", 1, 30)],
+        )
+        rollups.rebuild()
+        self.assertEqual(self.rollup_values(), incremental)
+
+        CensusSchedule.objects.all().delete()
+        self.assertFalse(CensusRollup.objects.exists())
+
+    def test_moving_a_membership_refreshes_both_bodies(self):
+        first = create_religious_body(1, self.denomination, self.location)
+        second = create_religious_body(
+            2, self.denomination, create_location(2, "Arlington", county="Arlington")
+        )
+
+        membership = first.membership.get()
+        membership.religious_body = second
+        membership.save()
+
+        incremental = self.rollup_values()
+        self.assertEqual(
+            incremental,
+            [
+                ("VA", "Arlington", "Methodist", 1, 60),
+                ("VA", "Fairfax", "Methodist", 1, 0),
+            ],
+        )
+        rollups.rebuild()
+        self.assertEqual(self.rollup_values(), incremental)
+
+    def test_overlapping_refreshes_keep_one_row_per_cell(self):
+        create_religious_body(1, self.denomination, self.location)
+        create_religious_body(2, None, self.location)
+        cells = rollups._build_cells(Q())
+
+        # Another refresh inserted the cells after this one deleted them
+        rollups._replace_cells(Q(pk__in=[]), cells)
+
+        self.assertEqual(CensusRollup.objects.count(), 2)
+
+    def test_suspended_signals_skip_rollups(self):
+        with rollups.suspended():
+            create_religious_body(1, self.denomination, self.location)
+        self.assertFalse(CensusRollup.objects.exists())
+
+
+@plain_static_storage
+class CensusAdminTestCase(TestCase):
+    # Session, user, count estimate, count and page, plus one query per
+    # list_filter on a field
+    CHANGELIST_QUERIES = {
+        "/admin/census/denomination/": 7,
+        "/admin/census/censusschedule/": 5,
+        "/admin/census/clergy/": 5,
+    }
+
+    def setUp(self):
+        user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(user)
+
+    def test_changelist_query_count_is_constant(self):
+        for rows in (1, 20):
+            for index in range(rows):
+                denomination = Denomination.objects.create(
+                    denomination_id=f"{rows}-{index}", name=f"Denomination {index}"
+                )
+                create_religious_body(rows * 100 + index, denomination, None)
+
+            for url, queries in self.CHANGELIST_QUERIES.items():
+                with self.subTest(url=url, rows=rows):
+                    with self.assertNumQueries(queries):
+                        response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_large_tables_are_counted_from_statistics(self):
+        for index in range(3):
+            Denomination.objects.create(
+                denomination_id=str(index), name=f"Denomination {index}"
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE census_denomination")
+
+        with mock.patch("religious_ecologies.admin.ESTIMATED_COUNT_THRESHOLD", 1):
+            paginator = EstimatedCountPaginator(
+                Denomination.objects.order_by("name"), 100
+            )
+            with self.assertNumQueries(1):
+                self.assertEqual(paginator.count, 3)
+
+            # Filtered changelists are counted exactly
+            paginator = EstimatedCountPaginator(
+                Denomination.objects.filter(name="Denomination 1"), 100
+            )
+            self.assertEqual(paginator.count, 1)
+
+    def test_schedule_inlines_only_offer_the_schedules_bodies(self):
+        denomination = Denomination.objects.create(denomination_id="1", name="Baptist")
+        bodies = [create_religious_body(index, denomination, None) for index in (1, 2)]
+        schedule = bodies[0].census_record
+        bodies[1].census_record = schedule
+        bodies[1].save()
+        # Bodies on other schedules are not offered
+        create_religious_body(3, denomination, None)
+        url = f"/admin/census/censusschedule/{schedule.pk}/change/"
+
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        form = response.context["inline_admin_formsets"][1].formset.forms[0]
+        self.assertEqual(
+            [label for _, label in form.fields["religious_body"].choices][1:],
+            ["Church 1", "Church 2"],
+        )
+
+        # The choices are read once for all of the membership forms
+        for body in bodies:
+            Membership.objects.create(census_record=schedule, religious_body=body)
+        with self.assertNumQueries(len(queries)):
+            self.client.get(url)
@@ -13,4 +13,12 @@ urlpatterns = [
     path("api/", include(router.urls)),
     # Map view
     path("map/", views.map_view, name="denomination_map"),
+    # Marker rendering benchmark, for development
+    path("map/benchmark/", views.map_benchmark, name="map_benchmark"),
+    # Columnar snapshots for analysis in pandas, R or Arrow
+    path(
+        "data/religious-bodies.<str:snapshot_format>",
+        views.analysis_snapshot,
+        name="analysis_snapshot",
+    ),
 ]
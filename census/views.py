@@ -1,29 +1,102 @@
-from django.shortcuts import render
+import os
 
-from .models import Denomination
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.views.decorators.cache import cache_control
 
+from .catalog import family_denomination_ids, get_catalog
+from .columnar import SNAPSHOT_FILES
+from .models import ReligiousBody
+from .snapshots import load_manifest
+from .stats import get_stats
 
+# Seconds browsers and proxies may reuse the rendered map page
+MAP_PAGE_MAX_AGE = 60 * 5
+
+SNAPSHOT_CONTENT_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+
+@cache_control(public=True, max_age=MAP_PAGE_MAX_AGE)
 def map_view(request):
-    """Render the map view with denomination filters"""
-    # Get all denominations for the filter dropdown
-    denominations = Denomination.objects.all().order_by("name")
-
-    # Get unique denomination families for the family filter dropdown
-    census_families = (
-        Denomination.objects.values_list("family_census", flat=True)
-        .distinct()
-        .order_by("family_census")
-    )
-    relec_families = (
-        Denomination.objects.values_list("family_relec", flat=True)
-        .distinct()
-        .order_by("family_relec")
+    """
+    Render the map view with the data it needs for first paint (families,
+    denominations, marker snapshots and the initial statistics) embedded in
+    the page, so it does not have to fetch them before showing anything.
+    """
+    catalog = get_catalog()
+    marker_snapshots = load_manifest()
+
+    # The map opens on the Adventist family if there is one
+    initial_family = next(
+        (
+            family["name"]
+            for family in catalog.census_families
+            if "advent" in family["name"].lower()
+        ),
+        None,
     )
+    initial_params = [("family_census", [initial_family])] if initial_family else []
 
-    context = {
-        "denominations": denominations,
-        "census_families": census_families,
-        "relec_families": relec_families,
+    bootstrap = {
+        "version": marker_snapshots["version"] if marker_snapshots else None,
+        "families": catalog.census_families,
+        "relec_families": catalog.relec_families,
+        "denominations": [
+            {
+                "id": denomination["id"],
+                "name": denomination["name"],
+                "family_census": denomination["family_census"],
+            }
+            for denomination in catalog.denominations
+        ],
+        # Prebuilt marker files for the unfiltered and single-family views
+        "marker_snapshots": marker_snapshots,
+        "initial": {
+            "family_census": initial_family,
+            "stats": get_stats(
+                initial_params,
+                lambda: ReligiousBody.objects.filter(
+                    denomination_id__in=family_denomination_ids(initial_family)
+                ),
+                request,
+            ),
+        },
     }
 
-    return render(request, "census/map.html", context)
+    # A TemplateResponse, so the render shows up in Server-Timing
+    return TemplateResponse(request, "census/map.html", {"bootstrap": bootstrap})
+
+
+def map_benchmark(request):
+    """
+    Render a page that times marker rendering with synthetic data. Only
+    available in development or to staff.
+    """
+    if not (settings.DEBUG or request.user.is_staff):
+        raise Http404
+    return TemplateResponse(request, "census/map_benchmark.html")
+
+
+def analysis_snapshot(request, snapshot_format):
+    """Download the latest Parquet or Arrow snapshot of the dataset"""
+    name = SNAPSHOT_FILES.get(snapshot_format)
+    if name is None or not default_storage.exists(name):
+        raise Http404("No analysis snapshot has been built")
+
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        # Remote storage such as S3 serves the file directly
+        return redirect(default_storage.url(name))
+    return FileResponse(
+        open(path, "rb"),
+        as_attachment=True,
+        filename=os.path.basename(name),
+        content_type=SNAPSHOT_CONTENT_TYPES[snapshot_format],
+    )
@@ -53,6 +53,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django.forms",
     # model viz
     "django_dbml",
@@ -77,7 +78,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "census.middleware.SnapshotWhiteNoiseMiddleware",
+    "religious_ecologies.middleware.ServerTimingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -90,6 +92,35 @@ MIDDLEWARE = [
 
 X_FRAME_OPTIONS = "SAMEORIGIN"
 
+# Fraction of requests (0.0 - 1.0) that get Server-Timing headers and timing logs
+SERVER_TIMING_SAMPLE_RATE = env.float(
+    "SERVER_TIMING_SAMPLE_RATE", default=1.0 if DEBUG else 0.05
+)
+
+# LOGGING
+# ------------------------------------------------------------------------------
+# The census app logs at WARNING unless CENSUS_LOG_LEVEL (e.g. INFO or DEBUG)
+# raises it; request timings are logged at INFO when sampled.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+        },
+    },
+    "loggers": {
+        "census": {
+            "handlers": ["console"],
+            "level": env("CENSUS_LOG_LEVEL", default="WARNING"),
+        },
+        "religious_ecologies": {
+            "handlers": ["console"],
+            "level": env("DJANGO_LOG_LEVEL", default="INFO"),
+        },
+    },
+}
+
 # DEBUG
 # ------------------------------------------------------------------------------
 # django-debug-toolbar
@@ -193,13 +224,22 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = (os.path.join(BASE_DIR, "static"),)
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
+# Precompressed map marker snapshots written by build_marker_snapshots and
+# served by SnapshotWhiteNoiseMiddleware
+MARKER_SNAPSHOT_ROOT = env(
+    "MARKER_SNAPSHOT_ROOT", default=os.path.join(BASE_DIR, "snapshots")
+)
+MARKER_SNAPSHOT_URL = "/snapshots/"
+
 # Storage backend
 STORAGES = {
     "default": {
         "BACKEND": "django.core.files.storage.FileSystemStorage",
     },
+    # Content-hashed, precompressed static files; WhiteNoise serves hashed
+    # names with far-future immutable caching
     "staticfiles": {
-        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     },
 }
 
@@ -221,6 +261,11 @@ else:
     MEDIA_URL = "media/"
     MEDIA_ROOT = os.path.join(BASE_DIR, "mediafiles")
 
+# REST framework
+REST_FRAMEWORK = {
+    "DEFAULT_PAGINATION_CLASS": "census.pagination.IdCursorPagination",
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -5,10 +5,10 @@ import requests
 from django.contrib import admin, messages
 from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
-from unfold.admin import ModelAdmin
 from urllib3.util.retry import Retry
 
 from location.models import Location
+from religious_ecologies.admin import BaseModelAdmin
 
 
 def get_requests_session(retries=3, backoff_factor=0.3):
@@ -93,13 +93,15 @@ def sync_locations(modeladmin, request, queryset):
 
 
 @admin.register(Location)
-class LocationAdmin(ModelAdmin):
+class LocationAdmin(BaseModelAdmin):
+    # States are two-letter codes, so they are matched exactly
     search_fields = [
         "map_name",
         "city",
         "county",
-        "state",
+        "=state",
     ]
+    search_rank_fields = ["map_name", "city"]
 
     list_display = [
         "map_name",
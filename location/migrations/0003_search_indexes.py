@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:25
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("location", "0002_alter_historicallocation_place_id_and_more"),
+        # Creates the pg_trgm extension
+        ("census", "0008_religious_body_search"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="location",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("map_name"),
+                    name="gin_trgm_ops",
+                ),
+                name="location_map_name_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="location",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("city"), name="gin_trgm_ops"
+                ),
+                name="location_city_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="location",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("county"), name="gin_trgm_ops"
+                ),
+                name="location_county_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="location",
+            index=models.Index(
+                django.db.models.functions.text.Upper("state"),
+                name="location_state_upper",
+            ),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from simple_history.models import HistoricalRecords
 
 
@@ -22,5 +24,24 @@ class Location(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     history = HistoricalRecords()
 
+    class Meta:
+        # Back the admin search and autocomplete: trigram indexes for the
+        # contains and prefix matches on names, and an index for exact states
+        indexes = [
+            GinIndex(
+                OpClass(Upper("map_name"), name="gin_trgm_ops"),
+                name="location_map_name_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("city"), name="gin_trgm_ops"),
+                name="location_city_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("county"), name="gin_trgm_ops"),
+                name="location_county_trgm",
+            ),
+            models.Index(Upper("state"), name="location_state_upper"),
+        ]
+
     def __str__(self):
         return f"{self.map_name}, {self.county}, {self.state}"
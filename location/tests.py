@@ -1,3 +1,42 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from religious_ecologies.testing import create_location, plain_static_storage
+
+
+@plain_static_storage
+class LocationAdminTestCase(TestCase):
+    def setUp(self):
+        user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(user)
+
+    def test_changelist_query_count_is_constant(self):
+        for rows in (1, 20):
+            for index in range(rows):
+                create_location(rows * 100 + index, f"City {index}")
+
+            # Session, user, count estimate, count, page and the state filter
+            with self.subTest(rows=rows), self.assertNumQueries(6):
+                response = self.client.get("/admin/location/location/")
+            self.assertEqual(response.status_code, 200)
+
+    def test_autocomplete_ranks_prefix_matches_first(self):
+        for index, name in enumerate(["West Fairfax", "Fairfax", "Alexandria"]):
+            create_location(
+                index, name, county="Alexandria" if name == "Alexandria" else "Fairfax"
+            )
+
+        response = self.client.get(
+            "/admin/autocomplete/",
+            {
+                "term": "fair",
+                "app_label": "census",
+                "model_name": "religiousbody",
+                "field_name": "location",
+            },
+        )
+
+        self.assertEqual(
+            [result["text"] for result in response.json()["results"]],
+            ["Fairfax, Fairfax, VA", "West Fairfax, Fairfax, VA"],
+        )
@@ -1,3 +1,81 @@
-from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Upper
+from django.db.models.lookups import StartsWith
+from django.utils.functional import cached_property
+from unfold.admin import ModelAdmin
 
-# Register your models here.
+# Unfiltered changelists of tables estimated to hold more rows than this show
+# the planner's estimate instead of an exact count
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def estimated_row_count(model, using="default"):
+    """
+    Return PostgreSQL's estimate of a model's row count from pg_class, or
+    None if the table has not been analyzed or the database is not PostgreSQL.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 for tables that have never been vacuumed or analyzed
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that counts unfiltered querysets of large tables from the
+    table statistics, so a changelist page does not scan the whole table.
+    Filtered and small querysets are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, "query", None)
+        if query is not None and not query.where:
+            estimate = estimated_row_count(queryset.model, using=queryset.db)
+            if estimate is not None and estimate > ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class BaseModelAdmin(ModelAdmin):
+    """
+    Unfold ModelAdmin for large tables. Changelists use estimated counts and
+    skip the second, unfiltered count shown next to filtered results.
+
+    Search results, including autocomplete suggestions, list rows where one
+    of `search_rank_fields` starts with the search term first. Admin search
+    compares UPPER(field), so fields with UPPER(field) gin_trgm_ops indexes
+    are searched through the index.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    search_rank_fields = []
+
+    def get_search_results(self, request, queryset, search_term):
+        queryset, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        term = search_term.strip().upper()
+        if term and self.search_rank_fields:
+            prefix = Q()
+            for field in self.search_rank_fields:
+                prefix |= Q(StartsWith(Upper(field), term))
+            # Changelists apply their own ordering afterwards; autocomplete
+            # keeps this one
+            queryset = queryset.annotate(
+                search_prefix=Case(When(prefix, then=Value(0)), default=Value(1))
+            ).order_by("search_prefix", *self.search_rank_fields, "pk")
+        return queryset, may_have_duplicates
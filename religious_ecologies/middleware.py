@@ -0,0 +1,144 @@
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import cc_delim_re
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings:
+    """
+    Accumulates per-request timing measurements in milliseconds.
+    """
+
+    def __init__(self):
+        self.query_count = 0
+        self.durations = {"db": 0.0, "serialize": 0.0, "render": 0.0}
+        self.render_started = None
+
+    def add(self, name, duration_ms):
+        self.durations[name] = self.durations.get(name, 0.0) + duration_ms
+
+    def record_query(self, execute, sql, params, many, context):
+        """Database execute wrapper counting queries and their duration."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.add("db", (time.perf_counter() - start) * 1000)
+
+
+def get_timings(request):
+    """
+    Return the RequestTimings for a request, or None if it is not sampled.
+    Accepts both Django HttpRequest and DRF Request objects.
+    """
+    request = getattr(request, "_request", request)
+    return getattr(request, "timings", None)
+
+
+@contextmanager
+def timing(request, name):
+    """
+    Time the enclosed block and add it to the request's Server-Timing entry
+    `name`. Does nothing for requests that are not sampled.
+    """
+    timings = get_timings(request)
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - start) * 1000)
+
+
+def is_publicly_cacheable(response):
+    """Whether the response's Cache-Control lets shared caches store it."""
+    directives = {
+        directive.split("=", 1)[0].strip().lower()
+        for directive in cc_delim_re.split(response.get("Cache-Control", ""))
+    }
+    return bool(directives & {"public", "s-maxage"})
+
+
+class ServerTimingMiddleware:
+    """
+    Records database, serialization, render and total time for a sample of
+    requests, then reports them in a Server-Timing header and a log line.
+
+    The fraction of requests measured is set by SERVER_TIMING_SAMPLE_RATE.
+    Responses that shared caches may store are only logged, so query counts
+    and timings are not served from the cache to other clients.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = getattr(settings, "SERVER_TIMING_SAMPLE_RATE", 0.0)
+        if sample_rate <= 0 or random.random() >= sample_rate:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        request.timings = timings
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings.record_query))
+            response = self.get_response(request)
+        total = (time.perf_counter() - start) * 1000
+
+        if not is_publicly_cacheable(response):
+            response["Server-Timing"] = ", ".join(
+                [
+                    f'db;dur={timings.durations["db"]:.1f};desc="{timings.query_count} queries"',
+                    f"serialize;dur={timings.durations['serialize']:.1f}",
+                    f"render;dur={timings.durations['render']:.1f}",
+                    f"total;dur={total:.1f}",
+                ]
+            )
+
+        resolver_match = getattr(request, "resolver_match", None)
+        view_name = resolver_match.view_name if resolver_match else None
+        logger.info(
+            "request timing path=%s view=%s status=%s queries=%d db_ms=%.1f "
+            "serialize_ms=%.1f render_ms=%.1f total_ms=%.1f",
+            request.path,
+            view_name,
+            response.status_code,
+            timings.query_count,
+            timings.durations["db"],
+            timings.durations["serialize"],
+            timings.durations["render"],
+            total,
+            extra={
+                "path": request.path,
+                "view": view_name,
+                "status": response.status_code,
+                "queries": timings.query_count,
+                "timings": dict(timings.durations, total=total),
+            },
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        """Time template and DRF renderer output, which happens after the view."""
+        timings = get_timings(request)
+        if timings is not None:
+            timings.render_started = time.perf_counter()
+
+            def record_render(rendered):
+                timings.add(
+                    "render", (time.perf_counter() - timings.render_started) * 1000
+                )
+
+            response.add_post_render_callback(record_render)
+        return response
@@ -0,0 +1,31 @@
+from django.test import override_settings
+
+from location.models import Location
+
+# Pages that render {% static %} need collectstatic under the manifest storage
+# used outside of tests, so tests of those pages use plain static storage
+plain_static_storage = override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    }
+)
+
+
+def create_location(place_id=1, name="Fairfax", county="Fairfax", **fields):
+    """Create a Virginia location, named after its city by default."""
+    return Location.objects.create(
+        **{
+            "place_id": place_id,
+            "state": "VA",
+            "city": name,
+            "county": county,
+            "map_name": name,
+            "county_ahcb": county,
+            "lat": 38.85,
+            "lon": -77.3,
+            **fields,
+        }
+    )
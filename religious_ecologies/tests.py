@@ -1,3 +1,64 @@
-from django.test import TestCase
+import re
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from census.models import Denomination
+
+from .testing import plain_static_storage
+
+
+def server_timing(response):
+    """Parse a Server-Timing header into {name: (duration, description)}."""
+    entries = {}
+    for entry in response["Server-Timing"].split(", "):
+        name, _, params = entry.partition(";")
+        duration = re.search(r"dur=([\d.]+)", params)
+        description = re.search(r'desc="([^"]*)"', params)
+        entries[name] = (
+            float(duration.group(1)),
+            description.group(1) if description else None,
+        )
+    return entries
+
+
+@plain_static_storage
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1.0)
+class ServerTimingMiddlewareTestCase(TestCase):
+    def setUp(self):
+        for index in range(50):
+            Denomination.objects.create(
+                denomination_id=str(index),
+                name=f"Denomination {index}",
+                family_census="Methodist",
+            )
+
+    def test_api_responses_report_queries_serializer_and_render_time(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                "/census/api/denominations/?family_census=Methodist"
+            )
+
+        timings = server_timing(response)
+        self.assertEqual(list(timings), ["db", "serialize", "render", "total"], timings)
+        self.assertEqual(timings["db"][1], "1 queries")
+        self.assertGreater(timings["serialize"][0], 0)
+        self.assertGreater(timings["render"][0], 0)
+        self.assertGreaterEqual(
+            timings["total"][0], timings["db"][0] + timings["serialize"][0]
+        )
+
+    def test_publicly_cached_pages_only_log_their_timings(self):
+        with self.assertLogs("religious_ecologies.middleware", "INFO") as logs:
+            response = self.client.get("/census/map/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertNotIn("Server-Timing", response)
+        self.assertGreater(logs.records[0].timings["render"], 0)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_have_no_header(self):
+        response = self.client.get("/census/api/denominations/?family_census=X")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)